@@ -0,0 +1,106 @@
+import queue
+import threading
+import tkinter as tk
+
+
+class TaskCancelled(Exception):
+    """Raised inside a worker function when its task has been cancelled."""
+
+
+class BackgroundTask:
+    """Run a long operation on a worker thread and report back to the Tk loop.
+
+    ``func`` is called on a worker thread with the task as its only argument so
+    it can call :meth:`report_progress` and :meth:`check_cancelled`. Progress,
+    results and errors are passed through a queue that is polled from the Tk
+    event loop with ``after()``, so every callback runs on the Tk thread.
+    """
+
+    def __init__(self, master, func, on_success=None, on_error=None,
+                 on_progress=None, on_cancel=None, poll_interval_ms=50):
+        """Store the callbacks; call :meth:`start` to launch the worker."""
+        self.master = master
+        self.func = func
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.poll_interval_ms = poll_interval_ms
+        self._queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = None
+        self._finished = False
+
+    @property
+    def cancelled(self):
+        """Return True once :meth:`cancel` has been called."""
+        return self._cancel_event.is_set()
+
+    @property
+    def running(self):
+        """Return True while the task has not delivered its outcome."""
+        return self._thread is not None and not self._finished
+
+    def start(self):
+        """Launch the worker thread and begin polling for its messages."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.master.after(self.poll_interval_ms, self._poll)
+        return self
+
+    def cancel(self):
+        """Request cancellation.
+
+        The worker stops at its next :meth:`check_cancelled` call. Operations
+        that cannot be interrupted (such as a single sheet parse) run to the end
+        and their result is discarded.
+        """
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """Raise :class:`TaskCancelled` if cancellation was requested."""
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report_progress(self, fraction=None, message=None):
+        """Send progress (0.0-1.0, or None if unknown) to the Tk thread."""
+        self._queue.put(("progress", (fraction, message)))
+
+    def _run(self):
+        try:
+            result = self.func(self)
+        except TaskCancelled:
+            self._queue.put(("cancelled", None))
+        except Exception as e:
+            self._queue.put(("error", e))
+        else:
+            self._queue.put(("done", result))
+
+    def _poll(self):
+        try:
+            while True:
+                kind, payload = self._queue.get_nowait()
+                if kind == "progress":
+                    if self.on_progress and not self.cancelled:
+                        self.on_progress(*payload)
+                    continue
+                self._finished = True
+                if kind == "done" and self.cancelled:
+                    kind = "cancelled"
+                if kind == "done":
+                    if self.on_success: self.on_success(payload)
+                elif kind == "error":
+                    if self.cancelled:
+                        if self.on_cancel: self.on_cancel()
+                    elif self.on_error:
+                        self.on_error(payload)
+                elif kind == "cancelled":
+                    if self.on_cancel: self.on_cancel()
+                return
+        except queue.Empty:
+            pass
+        try:
+            self.master.after(self.poll_interval_ms, self._poll)
+        except tk.TclError:
+            # The window was closed while the worker was still running.
+            self._cancel_event.set()
@@ -0,0 +1,238 @@
+"""Render graphs and statistics for many files from a saved preset without the GUI.
+
+Example::
+
+    python batch_render.py "投球動作" data/session01/*.xlsx -o out --format pdf --workers 4
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+from graph_render import compute_statistics, configure_japanese_font, render_figure, row_slice_from_strings
+from sheet_cache import SheetCache
+from sheet_store import CSV_EXTENSIONS, CsvSheetStore, LazySheetStore, is_csv_file
+
+
+DEFAULT_DB_PATH = os.path.join(os.getcwd(), "biograph_presets.db")
+SUPPORTED_EXTENSIONS = (".xlsx", ".xls") + CSV_EXTENSIONS
+
+
+def use_agg_backend():
+    """Switch matplotlib to the Agg backend; used in ``main`` and as the worker initializer.
+
+    Not done at import time, because the GUI imports this module and keeps
+    its Tk backend.
+    """
+    matplotlib.use("Agg")
+
+
+def load_preset(db_path, preset_name):
+    """Return the settings dictionary stored under ``preset_name``."""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Preset database not found: {db_path}")
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT settings FROM presets WHERE name = ?", (preset_name,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        raise KeyError(f"Preset '{preset_name}' was not found in {db_path}")
+    return json.loads(row[0])
+
+
+def expand_inputs(inputs):
+    """Expand files, directories and glob patterns into a sorted list of data files."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in os.listdir(item)]
+        else:
+            candidates = glob.glob(item) or [item]
+        for path in sorted(candidates):
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS) and path not in paths:
+                paths.append(path)
+    return paths
+
+
+def safe_file_name(text):
+    """Return ``text`` with characters that are invalid in file names replaced."""
+    return re.sub(r'[\\/:*?"<>|]+', "_", str(text)).strip() or "sheet"
+
+
+def open_sheet_store(path, use_cache=True):
+    """Open a workbook or CSV file as a sheet store."""
+    cache = SheetCache() if use_cache else None
+    if is_csv_file(path):
+        return CsvSheetStore(path, cache=cache)
+    return LazySheetStore(path, cache=cache)
+
+
+def render_sheet(df, settings, output_base, image_format="png", dpi=300, write_stats=True):
+    """Render one sheet and write its graph (and statistics CSV) next to ``output_base``."""
+    row_slice = row_slice_from_strings(len(df), settings.get('start_row', ""), settings.get('end_row', ""))
+    sliced_df = df.iloc[row_slice]
+    figure = render_figure(sliced_df, settings, dpi=dpi)
+    image_path = f"{output_base}.{image_format}"
+    figure.savefig(image_path, bbox_inches='tight', dpi=dpi)
+    written = [image_path]
+    if write_stats:
+        stats_df = compute_statistics(sliced_df, settings.get('x_axis_column'), settings.get('y_axis_columns', []),
+                                      settings.get('legend_labels', {}))
+        stats_path = f"{output_base}_stats.csv"
+        stats_df.to_csv(stats_path, index=False, encoding="utf-8-sig")
+        written.append(stats_path)
+    return written
+
+
+def render_file(path, settings, output_dir, image_format="png", dpi=300, write_stats=True, sheets=None, use_cache=True):
+    """Render every (or each requested) sheet of one file.
+
+    Returns a list of ``(path, sheet name, written files, error message)``
+    tuples; a sheet that cannot be rendered does not stop the others.
+    """
+    configure_japanese_font()
+    results = []
+    try:
+        store = open_sheet_store(path, use_cache=use_cache)
+    except Exception as e:
+        return [(path, None, [], f"{type(e).__name__}: {e}")]
+    try:
+        sheet_names = [name for name in store.sheet_names if not sheets or name in sheets]
+        for sheet_name in sheet_names:
+            results.append(_render_store_sheet(store, path, sheet_name, settings, output_dir, image_format, dpi, write_stats))
+    finally:
+        store.close()
+    return results
+
+
+def sheet_output_base(path, sheet_name, output_dir):
+    """Return the output path (without extension) for one sheet of ``path``."""
+    stem = safe_file_name(os.path.splitext(os.path.basename(path))[0])
+    return os.path.join(output_dir, stem if is_csv_file(path) else f"{stem}_{safe_file_name(sheet_name)}")
+
+
+def _render_store_sheet(store, path, sheet_name, settings, output_dir, image_format, dpi, write_stats, extra_columns=None):
+    """Render one sheet of an open store and return a ``(path, sheet, written, error)`` tuple."""
+    try:
+        df = store[sheet_name]
+        if extra_columns:
+            df = df.copy(deep=False)
+            for col_name, series in extra_columns.items():
+                df[col_name] = series
+        written = render_sheet(df, settings, sheet_output_base(path, sheet_name, output_dir), image_format, dpi, write_stats)
+        return (path, sheet_name, written, None)
+    except KeyError as e:
+        return (path, sheet_name, [], f"列が見つかりません: {e}")
+    except Exception as e:
+        return (path, sheet_name, [], f"{type(e).__name__}: {e}")
+
+
+def render_file_sheet(path, sheet_name, settings, output_dir, image_format="png", dpi=300, write_stats=True,
+                      use_cache=True, extra_columns=None):
+    """Render a single sheet of ``path`` so the sheets of one workbook can be spread over processes.
+
+    ``extra_columns`` maps column names to Series added to the sheet before
+    rendering (the GUI passes the columns created with 微分/積分 this way).
+    Returns one ``(path, sheet name, written files, error message)`` tuple.
+    """
+    configure_japanese_font()
+    try:
+        store = open_sheet_store(path, use_cache=use_cache)
+    except Exception as e:
+        return (path, sheet_name, [], f"{type(e).__name__}: {e}")
+    try:
+        return _render_store_sheet(store, path, sheet_name, settings, output_dir, image_format, dpi, write_stats, extra_columns)
+    finally:
+        store.close()
+
+
+def export_sheets(path, sheet_names, settings, output_dir, image_format="png", dpi=300, write_stats=False,
+                  extra_columns_by_sheet=None, max_workers=None, task=None):
+    """Render the given sheets of one file in a process pool, one sheet per job.
+
+    ``task`` is an optional :class:`background_task.BackgroundTask` used to
+    report progress and to stop early; sheets not yet started are dropped on
+    cancellation. Returns the result tuples in sheet order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    extra_columns_by_sheet = extra_columns_by_sheet or {}
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(sheet_names) or 1))
+    results = {}
+    executor = ProcessPoolExecutor(max_workers=max_workers, initializer=use_agg_backend)
+    try:
+        futures = {executor.submit(render_file_sheet, path, sheet_name, settings, output_dir, image_format, dpi,
+                                   write_stats, True, extra_columns_by_sheet.get(sheet_name)): sheet_name
+                   for sheet_name in sheet_names}
+        for future in as_completed(futures):
+            sheet_name = futures[future]
+            results[sheet_name] = future.result()
+            if task:
+                task.check_cancelled()
+                task.report_progress(len(results) / len(sheet_names), f"{len(results)} / {len(sheet_names)}: {sheet_name}")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return [results[sheet_name] for sheet_name in sheet_names]
+
+
+def parse_args(argv=None):
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Render graphs and statistics for many files using a saved preset.")
+    parser.add_argument("preset", help="name of the preset saved in the GUI")
+    parser.add_argument("inputs", nargs="+", help="data files, directories or glob patterns (.xlsx, .xls, .csv, .tsv)")
+    parser.add_argument("-o", "--output-dir", default="batch_output", help="directory for the rendered files (default: batch_output)")
+    parser.add_argument("--format", choices=("png", "pdf"), default="png", help="graph file format (default: png)")
+    parser.add_argument("--dpi", type=int, default=300, help="resolution of the rendered graphs (default: 300)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="preset database (default: ./biograph_presets.db)")
+    parser.add_argument("--sheet", action="append", dest="sheets", help="only render this sheet (may be repeated)")
+    parser.add_argument("--start-row", default="", help="first row to plot (1-based)")
+    parser.add_argument("--end-row", default="", help="last row to plot")
+    parser.add_argument("--no-stats", action="store_true", help="do not write statistics CSV files")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the on-disk sheet cache")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point of the batch renderer; returns the process exit code."""
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    use_agg_backend()
+    try:
+        settings = load_preset(args.db, args.preset)
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    settings['start_row'] = args.start_row
+    settings['end_row'] = args.end_row
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("No input files found.", file=sys.stderr)
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=use_agg_backend) as executor:
+        futures = {executor.submit(render_file, path, settings, args.output_dir, args.format, args.dpi,
+                                   not args.no_stats, args.sheets, not args.no_cache): path for path in paths}
+        for future in as_completed(futures):
+            for path, sheet_name, written, error in future.result():
+                label = f"{path} [{sheet_name}]" if sheet_name is not None else path
+                if error:
+                    failures += 1
+                    print(f"FAILED {label}: {error}", file=sys.stderr)
+                else:
+                    print(f"OK     {label} -> {', '.join(written)}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,37 +8,38 @@ from tkinter import ttk, filedialog, messagebox, simpledialog
 import pandas as pd
 import matplotlib
 from matplotlib.figure import Figure
+from matplotlib.text import Annotation
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import matplotlib.lines as mlines
 import re
 import numpy as np
-import platform
 import sqlite3
 import json
+import logging
 import os
 from scipy.integrate import cumulative_trapezoid
 
+from sheet_store import LazySheetStore, CsvSheetStore, DEFAULT_MEMORY_BUDGET_MB, is_csv_file, read_csv_header
+from background_task import BackgroundTask
+from sheet_cache import SheetCache
+import readers
+from decimation import decimate_for_view
+from nearest_point import NearestPointIndex
+from virtual_table import VirtualTable
+from table_format import DEFAULT_PRECISION, format_table, write_csv
+from statistics_engine import StatisticsCache
+from marker_lookup import XLookup, marker_values
+from batch_render import export_sheets
+from graph_render import (ASPECT_RATIOS, LEGEND_LOCATIONS, GRID_LINESTYLE_CHOICES, DEFAULT_FIGURE_WIDTH_INCHES,
+                          STATISTICS, configure_japanese_font)
+
+# pandas 2.x only enables Copy-on-Write on request (it is always on from 3.0).
+# Sheet frames and row slices are shared views, so CoW keeps them safe.
+if int(pd.__version__.split('.')[0]) == 2:
+    pd.set_option("mode.copy_on_write", True)
+
 # --- Matplotlibの日本語フォント設定 ---
-try:
-    if platform.system() == 'Windows':
-        font_candidates = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'TakaoPGothic', 'IPAexGothic', 'sans-serif']
-    elif platform.system() == 'Darwin':
-        font_candidates = ['Hiragino Sans', 'IPAexGothic', 'TakaoPGothic', 'AppleGothic', 'sans-serif']
-    else:
-        font_candidates = ['IPAexGothic', 'TakaoPGothic', 'VL Gothic', 'Noto Sans CJK JP', 'DejaVu Sans', 'sans-serif']
-    found_font = False
-    for font_name in font_candidates:
-        try:
-            matplotlib.font_manager.fontManager.findfont(font_name, fallback_to_default=False)
-            matplotlib.rcParams['font.family'] = font_name
-            found_font = True; break
-        except Exception:
-            # Ignore fonts that are unavailable on the current system
-            continue
-    if not found_font: matplotlib.rcParams['font.family'] = 'sans-serif'
-    matplotlib.rcParams['axes.unicode_minus'] = False
-except Exception as e:
-    print(f"Error setting Matplotlib font properties globally: {e}")
+configure_japanese_font()
 
 
 class AboutAppWindow(tk.Toplevel):
@@ -90,7 +91,7 @@ class AboutAppWindow(tk.Toplevel):
         
         features_content = """
         ■ 主な機能 (Ver 1.0.0)
-        - Excelファイル(.xlsx, .xls)からのデータ読み込み
+        - Excelファイル(.xlsx, .xls)およびCSV/TSVファイルからのデータ読み込み
         - シート選択、X軸・Y軸（複数可）データ列選択
         - グラフ描画（線グラフ）
         - グラフタイトル、軸ラベル、凡例名編集
@@ -144,6 +145,84 @@ class AboutAppWindow(tk.Toplevel):
         vsb.pack(side="right", fill="y")
 
 
+class ExportSettingsDialog(tk.Toplevel):
+    DPI_CHOICES = [100, 150, 200, 300, 600]
+
+    def __init__(self, master, rasterize_lines, dpi, decimate):
+        """Create a modal dialog for the options used when saving graphs and PDF reports."""
+        super().__init__(master)
+        self.title("グラフ書き出し設定")
+        self.resizable(False, False)
+        self.transient(master)
+        self.result = None
+
+        self.rasterize_var = tk.BooleanVar(self, value=rasterize_lines)
+        self.dpi_var = tk.IntVar(self, value=dpi)
+        self.decimate_var = tk.BooleanVar(self, value=decimate)
+
+        ttk.Checkbutton(self, text="データ線をラスタライズ (PDF: 軸・文字・マーカーはベクターのまま)", variable=self.rasterize_var).pack(anchor="w", padx=10, pady=(10, 2))
+        dpi_frame = ttk.Frame(self)
+        dpi_frame.pack(fill="x", padx=10, pady=2)
+        ttk.Label(dpi_frame, text="解像度 (DPI):").pack(side=tk.LEFT)
+        ttk.Combobox(dpi_frame, textvariable=self.dpi_var, values=self.DPI_CHOICES, state="readonly", width=6).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(self, text="書き出し時に出力解像度に合わせて間引く", variable=self.decimate_var).pack(anchor="w", padx=10, pady=2)
+
+        button_frame = ttk.Frame(self)
+        button_frame.pack(pady=10)
+        ttk.Button(button_frame, text="OK", command=self.on_ok).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="キャンセル", command=self.destroy).pack(side=tk.LEFT, padx=5)
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
+        self.grab_set()
+
+    def on_ok(self):
+        """Store the chosen options and close the dialog."""
+        self.result = (self.rasterize_var.get(), self.dpi_var.get(), self.decimate_var.get())
+        self.destroy()
+
+
+class ColumnSelectionDialog(tk.Toplevel):
+    def __init__(self, master, column_names):
+        """Create a modal dialog for choosing which columns of a file to load."""
+        super().__init__(master)
+        self.title("読み込む列の選択")
+        self.geometry("360x480")
+        self.transient(master)
+        self.result = None
+
+        ttk.Label(self, text=f"読み込む列を選択してください ({len(column_names)}列):").pack(anchor="w", padx=10, pady=(10, 5))
+        list_frame = ttk.Frame(self)
+        list_frame.pack(expand=True, fill="both", padx=10)
+        self.column_listbox = tk.Listbox(list_frame, selectmode=tk.MULTIPLE, exportselection=False)
+        self.column_listbox.pack(side=tk.LEFT, expand=True, fill="both")
+        vsb = ttk.Scrollbar(list_frame, orient="vertical", command=self.column_listbox.yview)
+        vsb.pack(side=tk.RIGHT, fill="y")
+        self.column_listbox.configure(yscrollcommand=vsb.set)
+        for col_name in column_names:
+            self.column_listbox.insert(tk.END, col_name)
+        self.column_listbox.selection_set(0, tk.END)
+
+        select_frame = ttk.Frame(self)
+        select_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Button(select_frame, text="すべて選択", command=lambda: self.column_listbox.selection_set(0, tk.END)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(select_frame, text="すべて解除", command=lambda: self.column_listbox.selection_clear(0, tk.END)).pack(side=tk.LEFT, padx=2)
+
+        button_frame = ttk.Frame(self)
+        button_frame.pack(pady=10)
+        ttk.Button(button_frame, text="読み込む", command=self.on_ok).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="キャンセル", command=self.destroy).pack(side=tk.LEFT, padx=5)
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
+        self.grab_set()
+
+    def on_ok(self):
+        """Store the selected column names and close the dialog."""
+        selected = [self.column_listbox.get(i) for i in self.column_listbox.curselection()]
+        if not selected:
+            messagebox.showwarning("未選択", "少なくとも1つの列を選択してください。", parent=self)
+            return
+        self.result = selected
+        self.destroy()
+
+
 class DataOutputWindow(tk.Toplevel):
     def __init__(self, master, app_instance):
         """Create a window for displaying sliced data and related tables."""
@@ -176,48 +255,46 @@ class DataOutputWindow(tk.Toplevel):
         self.app.data_output_window = None; self.destroy()
 
     def create_sliced_data_table(self, parent_frame):
-        """Show the current sliced dataframe in a Treeview table."""
-        table_frame = ttk.Frame(parent_frame)
-        table_frame.pack(expand=True, fill="both", padx=5, pady=5)
+        """Show the current sliced dataframe in a virtualized table.
 
+        Only the rows scrolled into view exist as Treeview items (see
+        :class:`virtual_table.VirtualTable`), so the tab opens immediately for
+        recordings of any length.
+        """
         if self.app.sliced_df is None or self.app.sliced_df.empty:
-            ttk.Label(table_frame, text="表示するデータがありません").pack(padx=10, pady=10)
+            ttk.Label(parent_frame, text="表示するデータがありません").pack(padx=10, pady=10)
             return
 
-        columns = self.app.sliced_df.columns.tolist()
-        self.sliced_data_tree = ttk.Treeview(table_frame, columns=columns, show="headings")
-        for col in columns:
-            self.sliced_data_tree.heading(col, text=col)
-            self.sliced_data_tree.column(col, width=100, anchor="center", minwidth=50)
-
-        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=self.sliced_data_tree.yview)
-        hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=self.sliced_data_tree.xview)
-        self.sliced_data_tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-
-        vsb.pack(side="right", fill="y")
-        hsb.pack(side="bottom", fill="x")
-        self.sliced_data_tree.pack(expand=True, fill="both")
+        self.sliced_data_table = VirtualTable(parent_frame, self.app.sliced_df, precision=DEFAULT_PRECISION)
+        self.sliced_data_table.pack(expand=True, fill="both", padx=5, pady=5)
 
-        for index, row in self.app.sliced_df.iterrows():
-            formatted_row = [f"{val:.3f}" if isinstance(val, (int, float)) else str(val) for val in row]
-            self.sliced_data_tree.insert("", "end", values=formatted_row)
+        precision_frame = ttk.Frame(parent_frame)
+        precision_frame.pack(pady=(5, 0))
+        ttk.Label(precision_frame, text="小数点以下の桁数:").pack(side=tk.LEFT)
+        self.precision_var = tk.StringVar(value=str(DEFAULT_PRECISION))
+        precision_combo = ttk.Combobox(precision_frame, textvariable=self.precision_var, values=[str(i) for i in range(11)], state="readonly", width=4)
+        precision_combo.pack(side=tk.LEFT, padx=5)
+        precision_combo.bind("<<ComboboxSelected>>", self.on_precision_selected)
 
-        copy_button = ttk.Button(parent_frame, text="テーブル内容をコピー", command=lambda: self.copy_treeview_to_clipboard(self.sliced_data_tree))
+        copy_button = ttk.Button(parent_frame, text="テーブル内容をコピー", command=self.copy_sliced_data_to_clipboard)
         copy_button.pack(pady=5)
 
         export_button = ttk.Button(parent_frame, text="CSVに保存...", command=self.export_sliced_data_to_csv)
         export_button.pack(pady=5)
 
-    def copy_treeview_to_clipboard(self, treeview):
-        """Copy all rows of the given Treeview widget to the clipboard."""
+    def on_precision_selected(self, event=None):
+        """Show the table with the selected number of decimals."""
+        self.sliced_data_table.precision = int(self.precision_var.get())
+        self.sliced_data_table.refresh()
+
+    def copy_sliced_data_to_clipboard(self):
+        """Copy all rows of the sliced data to the clipboard as tab-separated text.
+
+        The text is built from the column arrays (see :mod:`table_format`) with
+        the decimals shown in the table, not read back from the widget.
+        """
         try:
-            header = '\t'.join(treeview['columns']) + '\n'
-            items_data = []
-            for child_id in treeview.get_children():
-                values = treeview.item(child_id, 'values')
-                items_data.append('\t'.join(map(str, values)))
-            text_to_copy = header + '\n'.join(items_data)
-            
+            text_to_copy = format_table(self.app.sliced_df, sep='\t', precision=self.sliced_data_table.precision)
             self.clipboard_clear()
             self.clipboard_append(text_to_copy)
             self.update() 
@@ -239,7 +316,7 @@ class DataOutputWindow(tk.Toplevel):
         if not file_path:
             return
         try:
-            self.app.sliced_df.to_csv(file_path, index=False)
+            write_csv(self.app.sliced_df, file_path)
             messagebox.showinfo("成功", f"スライスデータを {file_path} に保存しました。", parent=self)
         except Exception as e:
             messagebox.showerror("保存失敗", f"CSV保存中にエラーが発生しました:\n{e}", parent=self)
@@ -254,6 +331,10 @@ class DataOutputWindow(tk.Toplevel):
         y_col_display_names = [self.app.legend_label_vars.get(original_name, tk.StringVar(value=original_name)).get() for original_name in selected_y_cols_original]
         columns.extend(y_col_display_names)
 
+        self.marker_interpolate_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(table_frame, text="マーカー位置の値を線形補間する (オフ: 最も近いサンプルの値)", variable=self.marker_interpolate_var,
+                        command=self.populate_marker_values_table).pack(anchor="w", pady=(0, 5))
+
         self.marker_tree = ttk.Treeview(table_frame, columns=columns, show="headings")
         for col in columns:
             self.marker_tree.heading(col, text=col)
@@ -286,49 +367,55 @@ class DataOutputWindow(tk.Toplevel):
             self.marker_tree.insert("", "end", values=("Y軸が選択されていません",) + ("",) * (len(self.marker_tree["columns"]) - 1))
             return
 
+        markers = []
         for vline_config in self.app.vline_configs:
             marker_name = vline_config['name_var'].get() or "(名称なし)"
             x_coord_str = vline_config['x_var'].get()
-            row_values = [marker_name]
-
-            if not x_coord_str:
-                row_values.extend(["N/A"] * (1 + len(selected_y_cols_original)))
-                self.marker_tree.insert("", "end", values=tuple(row_values))
-                continue
             try:
-                x_coord = float(x_coord_str)
-                row_values.append(f"{x_coord:.3f}")
-
-                if selected_x_col not in self.app.sliced_df.columns or not pd.api.types.is_numeric_dtype(self.app.sliced_df[selected_x_col]):
-                    row_values.extend(["X軸非数値/存在せず"] * len(selected_y_cols_original))
-                    self.marker_tree.insert("", "end", values=tuple(row_values))
-                    continue
-
-                valid_x_series = self.app.sliced_df[selected_x_col].dropna()
-                if valid_x_series.empty:
-                    row_values.extend(["X軸NaNのみ"] * len(selected_y_cols_original))
-                    self.marker_tree.insert("", "end", values=tuple(row_values))
-                    continue
-                
-                closest_idx = (valid_x_series - x_coord).abs().idxmin()
-
-                for y_col_original in selected_y_cols_original:
-                    if y_col_original in self.app.sliced_df.columns and closest_idx in self.app.sliced_df.index:
-                        y_val = self.app.sliced_df.loc[closest_idx, y_col_original]
-                        row_values.append(f"{y_val:.3f}" if pd.notnull(y_val) and isinstance(y_val, (int, float)) else "N/A")
-                    else:
-                        row_values.append("データなし")
+                x_coord = float(x_coord_str) if x_coord_str else None
             except ValueError:
+                x_coord = x_coord_str
+            markers.append((marker_name, x_coord))
+        targets = [x_coord for _, x_coord in markers if isinstance(x_coord, float)]
+
+        sliced_df = self.app.sliced_df
+        x_status = None
+        if selected_x_col not in sliced_df.columns or not pd.api.types.is_numeric_dtype(sliced_df[selected_x_col]):
+            x_status = "X軸非数値/存在せず"
+        else:
+            lookup = XLookup(sliced_df[selected_x_col].to_numpy(dtype=np.float64, na_value=np.nan))
+            if not len(lookup.values):
+                x_status = "X軸NaNのみ"
+        numeric_y_cols = [col for col in selected_y_cols_original
+                          if col in sliced_df.columns and pd.api.types.is_numeric_dtype(sliced_df[col])]
+        values = None
+        if x_status is None and targets:
+            # One binary search per marker, shared by every Y column.
+            values = marker_values(lookup, [sliced_df[col].to_numpy() for col in numeric_y_cols], targets,
+                                   interpolate=self.marker_interpolate_var.get())
+
+        target_index = 0
+        for marker_name, x_coord in markers:
+            row_values = [marker_name]
+            if x_coord is None:
+                row_values.extend(["N/A"] * (1 + len(selected_y_cols_original)))
+            elif not isinstance(x_coord, float):
                 row_values.append("X座標不正")
                 row_values.extend(["N/A"] * len(selected_y_cols_original))
-            except KeyError as e:
-                print(f"KeyError in populate_marker_values_table: {e}")
-                row_values.append(f"{x_coord:.3f}" if 'x_coord' in locals() else "X座標不明")
-                row_values.extend(["列エラー"] * len(selected_y_cols_original))
-            except Exception as e:
-                print(f"Error populating marker table row: {e}")
-                row_values.append(f"{x_coord:.3f}" if 'x_coord' in locals() else "X座標不明")
-                row_values.extend(["エラー"] * len(selected_y_cols_original))
+            else:
+                row_values.append(f"{x_coord:.3f}")
+                if x_status is not None:
+                    row_values.extend([x_status] * len(selected_y_cols_original))
+                else:
+                    marker_row = dict(zip(numeric_y_cols, values[target_index]))
+                    for y_col_original in selected_y_cols_original:
+                        if y_col_original not in sliced_df.columns:
+                            row_values.append("データなし")
+                        elif y_col_original not in marker_row or np.isnan(marker_row[y_col_original]):
+                            row_values.append("N/A")
+                        else:
+                            row_values.append(f"{marker_row[y_col_original]:.3f}")
+                target_index += 1
             self.marker_tree.insert("", "end", values=tuple(row_values))
 
 
@@ -337,11 +424,7 @@ class DataOutputWindow(tk.Toplevel):
         checkbox_frame = ttk.Frame(parent_frame)
         checkbox_frame.pack(pady=5, padx=5, fill="x")
         self.stat_vars = {} 
-        self.stat_items = {
-            "最大値": "max", "最小値": "min", "平均値": "mean",
-            "標準偏差": "std", "中央値": "median",
-            "最大値時のX座標": "idxmax_x", "最小値時のX座標": "idxmin_x"
-        }
+        self.stat_items = STATISTICS
         ttk.Label(checkbox_frame, text="表示する統計項目:").pack(side=tk.LEFT, padx=(0, 10))
         for display_name in self.stat_items.keys():
             var = tk.BooleanVar(value=True)
@@ -386,7 +469,6 @@ class DataOutputWindow(tk.Toplevel):
             self.stats_tree.insert("", "end", values=("Y軸が選択されていません",))
             return
 
-        selected_x_col = self.app.x_axis_var.get()
         active_stats_display_names = [name for name, var in self.stat_vars.items() if var.get()]
 
         if not active_stats_display_names:
@@ -402,54 +484,36 @@ class DataOutputWindow(tk.Toplevel):
             self.stats_tree.heading(col_name, text=col_name)
             self.stats_tree.column(col_name, width=120, anchor="center", minwidth=60)
 
+        for row_values in self.statistics_rows(selected_y_cols_original, active_stats_display_names):
+            self.stats_tree.insert("", "end", values=tuple(row_values))
 
-        for y_col_original in selected_y_cols_original:
-            y_col_display_name = self.app.legend_label_vars.get(y_col_original, tk.StringVar(value=y_col_original)).get()
-            row_values = [y_col_display_name]
-
-            if y_col_original not in self.app.sliced_df.columns:
-                row_values.extend(["列なし"] * len(active_stats_display_names))
-                self.stats_tree.insert("", "end", values=tuple(row_values))
-                continue
-            
-            y_series = self.app.sliced_df[y_col_original]
-
-            if not pd.api.types.is_numeric_dtype(y_series):
-                row_values.extend(["非数値データ"] * len(active_stats_display_names))
-                self.stats_tree.insert("", "end", values=tuple(row_values))
-                continue
+    def statistics_rows(self, y_cols, stat_display_names):
+        """Return one row of formatted statistics per Y column.
 
-            y_series_numeric = y_series.dropna()
-            if y_series_numeric.empty:
-                row_values.extend(["NaNのみ"] * len(active_stats_display_names))
-                self.stats_tree.insert("", "end", values=tuple(row_values))
+        The statistics come from the range indexes of the sheet columns and are
+        cached per sheet, row range and columns (see :mod:`statistics_engine`),
+        so changing the row range is cheap and toggling a statistic or writing
+        the report only formats them again.
+        """
+        sliced_rows = self.app.sliced_rows
+        source = self.app.sliced_source
+        if sliced_rows is not None and source is not None and source[0] is self.app.df and source[1] == self.app.df_generation:
+            results = self.app.statistics_cache.get(self.app.current_sheet_name, self.app.df, self.app.x_axis_var.get(), y_cols, rows=sliced_rows)
+        else:
+            results = self.app.statistics_cache.get(self.app.current_sheet_name, self.app.sliced_df, self.app.x_axis_var.get(), y_cols)
+        rows = []
+        for y_col_original in y_cols:
+            y_col_display_name = self.app.legend_label_vars.get(y_col_original, tk.StringVar(value=y_col_original)).get()
+            values = results[y_col_original]
+            if isinstance(values, str):
+                rows.append([y_col_display_name] + [values] * len(stat_display_names))
                 continue
-
-            for stat_display_name in active_stats_display_names:
-                stat_key = self.stat_items.get(stat_display_name)
-                val = "N/A"
-                try:
-                    if stat_key == "max": val = f"{y_series_numeric.max():.3f}"
-                    elif stat_key == "min": val = f"{y_series_numeric.min():.3f}"
-                    elif stat_key == "mean": val = f"{y_series_numeric.mean():.3f}"
-                    elif stat_key == "std": val = f"{y_series_numeric.std():.3f}"
-                    elif stat_key == "median": val = f"{y_series_numeric.median():.3f}"
-                    elif stat_key == "idxmax_x" and selected_x_col and selected_x_col in self.app.sliced_df.columns:
-                        idx_max = y_series_numeric.idxmax()
-                        if pd.notnull(idx_max) and idx_max in self.app.sliced_df.index:
-                            x_at_max = self.app.sliced_df.loc[idx_max, selected_x_col]
-                            val = f"{x_at_max:.3f}" if pd.notnull(x_at_max) and isinstance(x_at_max, (int, float)) else "N/A"
-                    elif stat_key == "idxmin_x" and selected_x_col and selected_x_col in self.app.sliced_df.columns:
-                        idx_min = y_series_numeric.idxmin()
-                        if pd.notnull(idx_min) and idx_min in self.app.sliced_df.index:
-                            x_at_min = self.app.sliced_df.loc[idx_min, selected_x_col]
-                            val = f"{x_at_min:.3f}" if pd.notnull(x_at_min) and isinstance(x_at_min, (int, float)) else "N/A"
-                except Exception as e:
-                    print(f"Error calculating stat {stat_key} for {y_col_original}: {e}")
-                    val = "計算エラー"
-                row_values.append(val)
-            self.stats_tree.insert("", "end", values=tuple(row_values))
-
+            row_values = [y_col_display_name]
+            for stat_display_name in stat_display_names:
+                value = values[self.stat_items[stat_display_name]]
+                row_values.append("N/A" if value is None else f"{value:.3f}")
+            rows.append(row_values)
+        return rows
 
     def collect_statistics_dataframe(self):
         """Return a pandas DataFrame of the currently displayed statistics."""
@@ -461,66 +525,12 @@ class DataOutputWindow(tk.Toplevel):
         if not selected_y_cols_original:
             return None
 
-        selected_x_col = self.app.x_axis_var.get()
         active_stats_display_names = [name for name, var in self.stat_vars.items() if var.get()]
         if not active_stats_display_names:
             return None
 
         columns = ["Y軸データ系列"] + active_stats_display_names
-        rows = []
-        for y_col_original in selected_y_cols_original:
-            y_col_display_name = self.app.legend_label_vars.get(
-                y_col_original, tk.StringVar(value=y_col_original)).get()
-            row_values = [y_col_display_name]
-
-            if y_col_original not in self.app.sliced_df.columns:
-                row_values.extend(["列なし"] * len(active_stats_display_names))
-                rows.append(row_values)
-                continue
-
-            y_series = self.app.sliced_df[y_col_original]
-            if not pd.api.types.is_numeric_dtype(y_series):
-                row_values.extend(["非数値データ"] * len(active_stats_display_names))
-                rows.append(row_values)
-                continue
-
-            y_series_numeric = y_series.dropna()
-            if y_series_numeric.empty:
-                row_values.extend(["NaNのみ"] * len(active_stats_display_names))
-                rows.append(row_values)
-                continue
-
-            for stat_display_name in active_stats_display_names:
-                stat_key = self.stat_items.get(stat_display_name)
-                val = "N/A"
-                try:
-                    if stat_key == "max":
-                        val = f"{y_series_numeric.max():.3f}"
-                    elif stat_key == "min":
-                        val = f"{y_series_numeric.min():.3f}"
-                    elif stat_key == "mean":
-                        val = f"{y_series_numeric.mean():.3f}"
-                    elif stat_key == "std":
-                        val = f"{y_series_numeric.std():.3f}"
-                    elif stat_key == "median":
-                        val = f"{y_series_numeric.median():.3f}"
-                    elif stat_key == "idxmax_x" and selected_x_col and selected_x_col in self.app.sliced_df.columns:
-                        idx_max = y_series_numeric.idxmax()
-                        if pd.notnull(idx_max) and idx_max in self.app.sliced_df.index:
-                            x_at_max = self.app.sliced_df.loc[idx_max, selected_x_col]
-                            val = f"{x_at_max:.3f}" if pd.notnull(x_at_max) and isinstance(x_at_max, (int, float)) else "N/A"
-                    elif stat_key == "idxmin_x" and selected_x_col and selected_x_col in self.app.sliced_df.columns:
-                        idx_min = y_series_numeric.idxmin()
-                        if pd.notnull(idx_min) and idx_min in self.app.sliced_df.index:
-                            x_at_min = self.app.sliced_df.loc[idx_min, selected_x_col]
-                            val = f"{x_at_min:.3f}" if pd.notnull(x_at_min) and isinstance(x_at_min, (int, float)) else "N/A"
-                except Exception as e:
-                    print(f"Error calculating stat {stat_key} for {y_col_original}: {e}")
-                    val = "計算エラー"
-                row_values.append(val)
-            rows.append(row_values)
-
-        return pd.DataFrame(rows, columns=columns)
+        return pd.DataFrame(self.statistics_rows(selected_y_cols_original, active_stats_display_names), columns=columns)
 
     def export_pdf_report(self):
         """Generate a simple PDF report with the graph and statistics table."""
@@ -538,17 +548,23 @@ class DataOutputWindow(tk.Toplevel):
 
         stats_df = self.collect_statistics_dataframe()
         try:
+            import io
+            # The figure is attached to the Tk canvas, so it is rendered here on the Tk thread;
+            # only the PDF composition runs in the background.
+            buf = io.BytesIO()
+            self.app.save_figure(buf, format="png", bbox_inches="tight")
+            buf.seek(0)
+        except Exception as e:
+            messagebox.showerror("保存失敗", f"PDF保存中にエラーが発生しました:\n{e}", parent=self)
+            return
+
+        def write_report(task):
             from reportlab.lib.pagesizes import A4
             from reportlab.lib import utils, colors
             from reportlab.pdfgen import canvas
             from reportlab.platypus import Table, TableStyle
-            import io
             from datetime import datetime
 
-            buf = io.BytesIO()
-            self.app.current_fig.savefig(buf, format="png", bbox_inches="tight", dpi=300)
-            buf.seek(0)
-
             c = canvas.Canvas(file_path, pagesize=A4)
             width, height = A4
 
@@ -563,6 +579,7 @@ class DataOutputWindow(tk.Toplevel):
             scale = max_w / iw if iw > 0 else 1
             img_h = ih * scale
             c.drawImage(img, 50, height - 70 - img_h, width=max_w, height=img_h)
+            task.check_cancelled()
 
             if stats_df is not None and not stats_df.empty:
                 table_data = [stats_df.columns.tolist()] + stats_df.values.tolist()
@@ -576,10 +593,30 @@ class DataOutputWindow(tk.Toplevel):
                 table_width, table_height = table.wrap(width - 100, height)
                 table.drawOn(c, 50, 50)
 
+            task.check_cancelled()
             c.save()
-            messagebox.showinfo("成功", f"レポートを {file_path} に保存しました。", parent=self)
-        except Exception as e:
-            messagebox.showerror("保存失敗", f"PDF保存中にエラーが発生しました:\n{e}", parent=self)
+            return file_path
+
+        # Release the modal grab so the cancel button in the main window stays usable.
+        self.grab_release()
+        task = self.app.run_background_task(write_report, "PDFレポートを作成中...",
+                                            on_success=lambda path: self.on_pdf_report_finished(path, None),
+                                            on_error=lambda e: self.on_pdf_report_finished(file_path, e),
+                                            on_cancel=lambda: self.on_pdf_report_finished(file_path, None, cancelled=True))
+        if task is None:
+            self.grab_set()
+
+    def on_pdf_report_finished(self, file_path, error, cancelled=False):
+        """Report the outcome of a background PDF export."""
+        parent = self if self.winfo_exists() else self.app.master
+        if self.winfo_exists():
+            self.grab_set()
+        if cancelled:
+            return
+        if error is None:
+            messagebox.showinfo("成功", f"レポートを {file_path} に保存しました。", parent=parent)
+        else:
+            messagebox.showerror("保存失敗", f"PDF保存中にエラーが発生しました:\n{error}", parent=parent)
 
 class BioGraphApp:
     def __init__(self, master):
@@ -588,26 +625,67 @@ class BioGraphApp:
         master.title("バイオメカニクス グラフ表示アプリ")
         master.geometry("1000x800")
 
+        self.decimation_enabled_var = tk.BooleanVar(value=True)
+        self.memmap_mode_var = tk.BooleanVar(value=False)
         self.create_menu(master)
 
         self.db_path = os.path.join(os.getcwd(), "biograph_presets.db")
         self.db_conn = None
         self.init_database()
 
-        self.df = None; self.sliced_df = None; self.sheet_names = []; self.column_names = []
+        self.df = None; self.sliced_df = None; self.sliced_rows = None; self.sheet_names = []; self.column_names = []
+        # Bumped whenever self.df is replaced or gains a column; sliced_source records the frame and
+        # generation the slice was taken from, so sliced_rows is only applied to that same frame.
+        self.df_generation = 0; self.sliced_source = None
         self.df_dict = {}; self.vline_configs = []; self.current_fig = None
         self.data_output_window = None
+        self.sheet_memory_budget_mb = DEFAULT_MEMORY_BUDGET_MB
+        self.background_task = None
+        self.current_sheet_name = None
+        self.derived_columns = {}
+        self.sheet_cache = SheetCache()
+        self.statistics_cache = StatisticsCache()
+        self.column_selection_threshold = 30
         self.plotted_lines = {}
+        self.column_lines = {}
+        self.line_source_data = {}
+        self.point_indexes = {}
+        self.decimated_view = None
+        self.overlay_artists = []
+        self.plot_data_source = None; self.plot_data_key = None
+        self.current_fig_size = None
+        self.redraw_delay_ms = 150
+        self.pending_redraw = None
+        self.last_draw_signature = None
+        self.last_axis_limits = {}
+        self.layout_cache = {}
+        self.layout_cache_size = 32
+        self.interacting = False
+        self.pending_full_render = None
+        self.interaction_settle_ms = 200
+        self.preview_detail = 0.25
+        self.export_rasterize_lines = False
+        self.export_dpi = 300
+        self.export_decimate = True
         self.tooltip_annotation = None
-
-        self.aspect_ratios = {"デフォルト (6:4)": (6, 4), "4:3": (4, 3), "16:9": (16, 9), "1:1 (正方形)": (1, 1), "3:4 (縦長)": (3, 4)}
-        self.default_figure_width_inches = 6
+        self.crosshair_lines = []
+        self.hover_axes = None
+        self.hover_background = None
+        self.panel_mode_var = tk.BooleanVar(value=False)
+        self.panel_height_inches = 1.0
+        self.panel_axes = []
+        self.column_axes = {}
+        self.plot_columns = None
+        self.current_panel_mode = None
+
+        self.aspect_ratios = ASPECT_RATIOS
+        self.default_figure_width_inches = DEFAULT_FIGURE_WIDTH_INCHES
         self.legend_label_vars = {}
         self.y_legend_entries_frame = None
         self.vline_colors = ["black", "red", "blue", "green", "orange", "purple", "gray", "cyan", "magenta", "brown"]
         self.vline_linestyles = {"実線": "-", "破線": "--", "点線": ":", "一点鎖線": "-."}
         self.vline_linewidths = [0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0]
-        self.legend_locations = {"自動": "best", "右上": "upper right", "左上": "upper left", "右下": "lower right", "左下": "lower left", "右": "right", "中央左": "center left", "中央右": "center right", "下中央": "lower center", "上中央": "upper center", "中央": "center"}
+        self.legend_locations = LEGEND_LOCATIONS
 
         self._applying_preset = False
         self.loaded_preset_settings = None
@@ -618,7 +696,7 @@ class BioGraphApp:
         self.plot_bg_color_choices = ["white", "lightgray", "ivory", "lightcyan", "whitesmoke", "gainsboro"]
         self.figure_bg_color_choices = ["white", "lightgray", "whitesmoke", "gainsboro", "#F0F0F0"]
         self.grid_color_choices = ["lightgray", "gray", "darkgray", "black", "red", "blue"]
-        self.grid_linestyle_choices = {"実線": "-", "破線": "--", "点線": ":", "一点鎖線": "-."}
+        self.grid_linestyle_choices = GRID_LINESTYLE_CHOICES
         self.grid_linewidth_choices = [0.5, 0.8, 1.0, 1.2, 1.5, 2.0]
         self.fontsize_choices = [8, 9, 10, 11, 12, 14, 16, 18, 20]
 
@@ -696,6 +774,13 @@ class BioGraphApp:
         self.file_path_label.pack(side=tk.LEFT, padx=5, pady=5, expand=True, fill="x")
         self.select_file_button = ttk.Button(file_frame, text="ファイルを選択...", command=lambda: self.load_excel_file_interactive())
         self.select_file_button.pack(side=tk.RIGHT, padx=5, pady=5)
+        self.task_status_frame = ttk.Frame(file_frame)
+        self.task_status_var = tk.StringVar()
+        ttk.Label(self.task_status_frame, textvariable=self.task_status_var).pack(side=tk.LEFT, padx=5)
+        self.task_progressbar = ttk.Progressbar(self.task_status_frame, orient=tk.HORIZONTAL, length=150, mode="indeterminate")
+        self.task_progressbar.pack(side=tk.LEFT, padx=5, expand=True, fill="x")
+        self.cancel_task_button = ttk.Button(self.task_status_frame, text="キャンセル", command=self.cancel_background_task)
+        self.cancel_task_button.pack(side=tk.LEFT, padx=5)
 
         sheet_frame = ttk.LabelFrame(self.scrollable_controls_frame, text="2. シート選択")
         sheet_frame.pack(padx=5, pady=5, fill="x")
@@ -878,6 +963,11 @@ class BioGraphApp:
         self.legend_loc_dropdown.pack(side=tk.LEFT, padx=5)
         self.legend_loc_dropdown.bind("<<ComboboxSelected>>", self.on_legend_loc_selected)
         self.legend_loc_var.set(list(self.legend_locations.keys())[0])
+
+        panel_mode_frame = ttk.Frame(display_settings_frame)
+        panel_mode_frame.pack(fill="x", padx=5, pady=2)
+        self.panel_mode_checkbox = ttk.Checkbutton(panel_mode_frame, text="Y軸データ系列ごとにパネルを分けて表示 (X軸共通)", variable=self.panel_mode_var, command=self.trigger_redraw_if_possible)
+        self.panel_mode_checkbox.pack(side=tk.LEFT, padx=5)
         
         self.on_grid_visibility_change()
 
@@ -900,6 +990,11 @@ class BioGraphApp:
         self.canvas_widget = None
         self.toolbar = None
 
+        # Axis range, title and axis label fields redraw the graph while typing.
+        for live_var in (self.x_min_var, self.x_max_var, self.y_min_var, self.y_max_var,
+                         self.graph_title_var, self.x_axis_label_var, self.y_axis_label_var):
+            live_var.trace_add("write", lambda *args: self.trigger_redraw_if_possible())
+
         self.load_presets_to_combobox()
         self.master.protocol("WM_DELETE_WINDOW", self.on_app_close)
         
@@ -943,10 +1038,63 @@ class BioGraphApp:
         """Create the menubar with a File→終了 option."""
         menubar = tk.Menu(master)
         file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="シートのメモリ上限を設定...", command=self.ask_sheet_memory_budget)
+        file_menu.add_command(label="読み込みキャッシュをクリア", command=self.clear_sheet_cache)
+        file_menu.add_command(label="読み込みエンジンの計測結果", command=self.show_reader_timings)
+        file_menu.add_command(label="グラフ書き出し設定...", command=self.ask_export_settings)
+        file_menu.add_command(label="全シートのグラフを書き出し...", command=self.export_all_sheets)
+        file_menu.add_checkbutton(label="大容量モード (数値列をメモリマップ、次回読み込みから)", variable=self.memmap_mode_var)
+        file_menu.add_checkbutton(label="間引き表示 (長いデータを画面解像度に合わせて描画)", variable=self.decimation_enabled_var,
+                                  command=self.trigger_redraw_if_possible)
+        file_menu.add_separator()
         file_menu.add_command(label="終了", command=self.on_app_close)
         menubar.add_cascade(label="ファイル", menu=file_menu)
         master.config(menu=menubar)
 
+    def ask_sheet_memory_budget(self):
+        """Prompt for the memory budget used to keep parsed sheets in memory."""
+        budget = simpledialog.askinteger("メモリ上限", "読み込み済みシートを保持するメモリ上限 (MB):",
+                                         initialvalue=self.sheet_memory_budget_mb, minvalue=16, parent=self.master)
+        if budget is None: return
+        self.sheet_memory_budget_mb = budget
+        if isinstance(self.df_dict, LazySheetStore):
+            self.df_dict.set_memory_budget(budget)
+
+    def clear_sheet_cache(self):
+        """Delete the on-disk cache of parsed workbook sheets."""
+        size_mb = self.sheet_cache.size_bytes() / (1024 * 1024)
+        if not messagebox.askyesno("キャッシュ削除確認", f"読み込みキャッシュ ({size_mb:.1f} MB) を削除しますか？", parent=self.master):
+            return
+        try:
+            kept = self.sheet_cache.clear()
+            if kept:
+                messagebox.showinfo("成功", f"読み込みキャッシュを削除しました。\n使用中の {kept} 件は開いているファイルを閉じた後に削除できます。", parent=self.master)
+            else:
+                messagebox.showinfo("成功", "読み込みキャッシュを削除しました。", parent=self.master)
+        except Exception as e:
+            messagebox.showerror("エラー", f"キャッシュの削除に失敗しました:\n{e}", parent=self.master)
+
+    def ask_export_settings(self):
+        """Prompt for the rasterization, resolution and decimation used when saving graphs."""
+        dialog = ExportSettingsDialog(self.master, self.export_rasterize_lines, self.export_dpi, self.export_decimate)
+        self.master.wait_window(dialog)
+        if dialog.result is None: return
+        self.export_rasterize_lines, self.export_dpi, self.export_decimate = dialog.result
+
+    def show_reader_timings(self):
+        """Show the installed reader engines and how long their reads took."""
+        lines = []
+        for fmt in ("xlsx", "xls", "csv", "parquet"):
+            engines = readers.available_engines(fmt)
+            lines.append(f"{fmt}: {' > '.join(engines) if engines else '(なし)'}")
+        timings = readers.engine_timings()
+        if timings:
+            lines.append("")
+            for (fmt, engine), (reads, total_seconds, per_mb) in sorted(timings.items()):
+                per_mb_text = f", {per_mb:.3f} 秒/MB" if per_mb is not None else ""
+                lines.append(f"{fmt} / {engine}: {reads} 回, 合計 {total_seconds:.2f} 秒{per_mb_text}")
+        messagebox.showinfo("読み込みエンジン", "\n".join(lines), parent=self.master)
+
     def init_database(self):
         """Create the SQLite database for storing presets if needed."""
         self.db_conn = sqlite3.connect(self.db_path)
@@ -960,6 +1108,8 @@ class BioGraphApp:
             return
         if self.db_conn:
             self.db_conn.close()
+        if isinstance(self.df_dict, LazySheetStore):
+            self.df_dict.close()
         if self.data_output_window and self.data_output_window.winfo_exists():
             self.data_output_window.destroy()
         if hasattr(self, '_about_window') and self._about_window and self._about_window.winfo_exists():
@@ -1058,15 +1208,11 @@ class BioGraphApp:
 
         settings_dict = self.loaded_preset_settings
 
-        if self.canvas_widget:
-            self.canvas_widget.get_tk_widget().destroy(); self.canvas_widget = None
-        if self.toolbar:
-            self.toolbar.destroy(); self.toolbar = None
+        self.discard_figure()
         if self.initial_graph_label:
             self.initial_graph_label.destroy(); self.initial_graph_label = None
         self.initial_graph_label = ttk.Label(self.graph_display_frame, text="ファイルと軸を選択して「グラフ描画」ボタンを押してください。")
         self.initial_graph_label.pack(padx=20, pady=20, expand=True)
-        self.current_fig = None
         self.sliced_df = None
 
         self.file_path_label.config(text="ファイルが選択されていません")
@@ -1169,19 +1315,72 @@ class BioGraphApp:
             except sqlite3.Error as e: messagebox.showerror("データベースエラー", f"プリセットの削除に失敗しました: {e}", parent=self.master)
 
     def load_excel_file_interactive(self):
-        """Prompt the user to select an Excel file and then load it."""
-        filepath = filedialog.askopenfilename(title="Excelファイルを選択", filetypes=(("Excelファイル", "*.xlsx *.xls"), ("すべてのファイル", "*.*")))
-        if filepath: self.load_excel_file(filepath=filepath)
-
-    def load_excel_file(self, filepath=None):
-        """Load an Excel workbook and initialize sheet and column options."""
+        """Prompt the user to select an Excel or CSV file and then load it."""
+        filepath = filedialog.askopenfilename(title="データファイルを選択", filetypes=(("Excel/CSVファイル", "*.xlsx *.xls *.csv *.tsv *.tab"), ("Excelファイル", "*.xlsx *.xls"), ("CSV/TSVファイル", "*.csv *.tsv *.tab"), ("すべてのファイル", "*.*")))
+        if not filepath: return
+        usecols = None
+        if is_csv_file(filepath):
+            try:
+                column_names = read_csv_header(filepath)
+            except Exception as e:
+                messagebox.showerror("エラー", f"ファイルの読み込みに失敗しました ({filepath}):\n{e}", parent=self.master)
+                return
+            if len(column_names) > self.column_selection_threshold and messagebox.askyesno(
+                    "列の選択", f"このファイルには{len(column_names)}列あります。読み込む列を選択しますか？\n(「いいえ」で全列を読み込みます)", parent=self.master):
+                dialog = ColumnSelectionDialog(self.master, column_names)
+                self.master.wait_window(dialog)
+                if dialog.result is None: return
+                usecols = dialog.result
+        self.load_excel_file(filepath=filepath, usecols=usecols)
+
+    def load_excel_file(self, filepath=None, usecols=None):
+        """Open an Excel workbook or CSV/TSV file in the background and initialize sheet options."""
         if filepath is None: return
         if not self._applying_preset:
             self.loaded_preset_settings = None
-
+        memory_budget_mb = self.sheet_memory_budget_mb
+        sheet_cache = self.sheet_cache
+        use_memmap = self.memmap_mode_var.get()
+        # The store opened by the worker; closed unless it is handed to on_workbook_loaded,
+        # so a cancelled or failed load does not keep the workbook open (and locked on Windows).
+        opened = {}
+
+        def open_workbook(task):
+            if is_csv_file(filepath):
+                sheet_store = CsvSheetStore(filepath, memory_budget_mb=memory_budget_mb, cache=sheet_cache, use_memmap=use_memmap, usecols=usecols)
+            else:
+                sheet_store = LazySheetStore(filepath, memory_budget_mb=memory_budget_mb, cache=sheet_cache, use_memmap=use_memmap)
+            opened["store"] = sheet_store
+            task.check_cancelled()
+            if sheet_store.sheet_names:
+                task.report_progress(None, f"シート '{sheet_store.sheet_names[0]}' を読み込み中...")
+                sheet_store.get(sheet_store.sheet_names[0])
+            return sheet_store
+
+        def close_opened_store():
+            sheet_store = opened.pop("store", None)
+            if sheet_store is not None:
+                sheet_store.close()
+
+        def on_loaded(sheet_store):
+            opened.pop("store", None)
+            self.on_workbook_loaded(filepath, sheet_store)
+
+        def on_failed(error):
+            close_opened_store()
+            self.on_workbook_load_failed(filepath, error)
+
+        self.run_background_task(open_workbook, "ファイルを読み込み中...",
+                                 on_success=on_loaded, on_error=on_failed, on_cancel=close_opened_store)
+
+    def on_workbook_loaded(self, filepath, sheet_store):
+        """Initialize sheet and column options for a workbook opened in the background."""
         try:
-            xls = pd.ExcelFile(filepath)
-            self.sheet_names = xls.sheet_names; self.df_dict = {name: xls.parse(name) for name in self.sheet_names}
+            if isinstance(self.df_dict, LazySheetStore):
+                self.df_dict.close()
+            self.sheet_names = sheet_store.sheet_names; self.df_dict = sheet_store
+            self.derived_columns = {}; self.current_sheet_name = None
+            self.statistics_cache.clear()
             self.file_path_label.config(text=filepath)
             self.sheet_dropdown.config(state="readonly"); self.sheet_var.set("")
             self.x_axis_listbox.config(state="disabled"); self.x_axis_var.set("")
@@ -1193,7 +1392,7 @@ class BioGraphApp:
             self.start_row_var.set(""); self.end_row_var.set("")
             for config_item in self.vline_configs: config_item['widgets_frame'].destroy()
             self.vline_configs.clear(); self.add_vline_button.config(state="normal")
-            self.current_fig = None; self.sliced_df = None
+            self.discard_figure(); self.sliced_df = None
             self.reset_display_settings_inputs()
 
             if self.data_output_window and self.data_output_window.winfo_exists():
@@ -1208,14 +1407,77 @@ class BioGraphApp:
                 self.sheet_dropdown.config(state="disabled")
 
         except Exception as e:
-            messagebox.showerror("エラー", f"ファイルの読み込みに失敗しました ({filepath}):\n{e}", parent=self.master)
-            self.file_path_label.config(text="ファイルが選択されていません")
-            self.current_fig = None; self.sliced_df = None
-            self.reset_display_settings_inputs()
-            if self.data_output_window and self.data_output_window.winfo_exists():
-                self.data_output_window.destroy()
-                self.data_output_window = None
-            self.loaded_preset_settings = None
+            self.on_workbook_load_failed(filepath, e)
+
+    def on_workbook_load_failed(self, filepath, error):
+        """Report a failed workbook load and reset the dependent UI state."""
+        messagebox.showerror("エラー", f"ファイルの読み込みに失敗しました ({filepath}):\n{error}", parent=self.master)
+        self.file_path_label.config(text="ファイルが選択されていません")
+        self.discard_figure(); self.sliced_df = None
+        self.reset_display_settings_inputs()
+        if self.data_output_window and self.data_output_window.winfo_exists():
+            self.data_output_window.destroy()
+            self.data_output_window = None
+        self.loaded_preset_settings = None
+
+    def run_background_task(self, func, message, on_success=None, on_error=None, on_cancel=None):
+        """Run ``func(task)`` on a worker thread while showing progress in the file frame."""
+        if self.background_task and self.background_task.running:
+            messagebox.showwarning("処理中", "別の処理が実行中です。完了するかキャンセルしてから再度お試しください。", parent=self.master)
+            return None
+
+        def finish(callback):
+            def handler(*args):
+                self.hide_task_progress()
+                if callback: callback(*args)
+            return handler
+
+        self.show_task_progress(message)
+        self.background_task = BackgroundTask(self.master, func,
+                                              on_success=finish(on_success),
+                                              on_error=finish(on_error),
+                                              on_progress=self.update_task_progress,
+                                              on_cancel=finish(on_cancel))
+        return self.background_task.start()
+
+    def cancel_background_task(self):
+        """Cancel the running background task, if any."""
+        if self.background_task and self.background_task.running:
+            self.background_task.cancel()
+            self.task_status_var.set("キャンセル中...")
+            self.cancel_task_button.config(state="disabled")
+
+    def show_task_progress(self, message):
+        """Show the progress bar and cancel button in the file frame."""
+        self.task_status_var.set(message)
+        self.task_progressbar.config(mode="indeterminate", value=0)
+        self.task_progressbar.start(15)
+        self.cancel_task_button.config(state="normal")
+        self.task_status_frame.pack(side=tk.BOTTOM, fill="x", padx=5, pady=(0, 5))
+        self.select_file_button.config(state="disabled")
+        self.sheet_dropdown.config(state="disabled")
+
+    def update_task_progress(self, fraction=None, message=None):
+        """Update the progress bar from a worker progress report."""
+        if message: self.task_status_var.set(message)
+        if fraction is None:
+            if str(self.task_progressbar.cget("mode")) != "indeterminate":
+                self.task_progressbar.config(mode="indeterminate")
+                self.task_progressbar.start(15)
+        else:
+            if str(self.task_progressbar.cget("mode")) != "determinate":
+                self.task_progressbar.stop()
+                self.task_progressbar.config(mode="determinate", maximum=100)
+            self.task_progressbar.config(value=max(0.0, min(1.0, fraction)) * 100)
+
+    def hide_task_progress(self):
+        """Hide the progress widgets once a background task has finished."""
+        self.task_progressbar.stop()
+        self.task_status_var.set("")
+        self.task_status_frame.pack_forget()
+        self.select_file_button.config(state="normal")
+        if self.sheet_names:
+            self.sheet_dropdown.config(state="readonly")
 
     def update_sheet_dropdown_options(self):
         """Refresh the sheet list based on the loaded Excel file."""
@@ -1234,10 +1496,43 @@ class BioGraphApp:
             self.diff_button.config(state="disabled")
             self.integ_button.config(state="disabled")
             self.reset_display_settings_inputs()
-            self.current_fig = None; self.sliced_df = None
+            self.discard_figure(); self.sliced_df = None
             return
 
-        self.df = self.df_dict[selected_sheet_name].copy()
+        if isinstance(self.df_dict, LazySheetStore) and not self.df_dict.is_loaded(selected_sheet_name):
+            sheet_store = self.df_dict
+            self.run_background_task(lambda task: sheet_store.get(selected_sheet_name),
+                                     f"シート '{selected_sheet_name}' を読み込み中...",
+                                     on_success=lambda sheet_df: self.show_sheet(selected_sheet_name, sheet_df),
+                                     on_error=lambda e: self.on_sheet_load_failed(selected_sheet_name, e),
+                                     on_cancel=lambda: self.sheet_var.set(self.current_sheet_name or ""))
+            return
+        try:
+            sheet_df = self.df_dict[selected_sheet_name]
+        except Exception as e:
+            self.on_sheet_load_failed(selected_sheet_name, e)
+            return
+        self.show_sheet(selected_sheet_name, sheet_df)
+
+    def on_sheet_load_failed(self, sheet_name, error):
+        """Report a sheet that could not be parsed and disable the column selectors."""
+        messagebox.showerror("エラー", f"シート '{sheet_name}' の読み込みに失敗しました:\n{error}", parent=self.master)
+        self.x_axis_listbox.config(state="disabled"); self.x_axis_var.set("")
+        self.y_axis_listbox.config(state="disabled"); self.y_axis_listbox.delete(0, tk.END)
+        self.draw_graph_button.config(state="disabled"); self.create_table_button.config(state="disabled")
+        self.diff_button.config(state="disabled")
+        self.integ_button.config(state="disabled")
+        self.reset_display_settings_inputs()
+        self.df = None; self.discard_figure(); self.sliced_df = None
+
+    def show_sheet(self, selected_sheet_name, sheet_df):
+        """Make the given parsed sheet current and refresh the column list boxes."""
+        if self.sheet_var.get() != selected_sheet_name:
+            # Another sheet was selected while this one was loading.
+            return
+        self.current_sheet_name = selected_sheet_name
+        self.df = self.compose_sheet_frame(selected_sheet_name, sheet_df)
+        self.df_generation += 1
         self.column_names = self.df.columns.tolist()
 
         if self.column_names:
@@ -1269,7 +1564,20 @@ class BioGraphApp:
             self.diff_button.config(state="disabled")
             self.integ_button.config(state="disabled")
             self.reset_display_settings_inputs()
-            self.current_fig = None; self.sliced_df = None
+            self.discard_figure(); self.sliced_df = None
+
+    def compose_sheet_frame(self, sheet_name, sheet_df):
+        """Return the sheet with its derived columns without copying the sheet data.
+
+        The parsed sheet is shared with the sheet store (and may be memory-mapped),
+        so it is never modified; columns created by _process_data live in a
+        per-sheet overlay and are added to a shallow copy. Copy-on-Write makes
+        the shallow copy behave like an independent frame.
+        """
+        df = sheet_df.copy(deep=False)
+        for col_name, series in self.derived_columns.get(sheet_name, {}).items():
+            df[col_name] = series
+        return df
 
     def on_x_axis_selected(self, event):
         """Update the UI when a new X-axis column is chosen."""
@@ -1430,8 +1738,37 @@ class BioGraphApp:
         self.trigger_redraw_if_possible()
 
     def trigger_redraw_if_possible(self):
-        """Redraw the graph if X and Y selections are available."""
-        if self.x_axis_var.get() and self.y_axis_listbox.curselection() and self.df is not None: self.draw_graph()
+        """Schedule a redraw if X and Y selections are available.
+
+        Changes arriving within ``redraw_delay_ms`` of each other are coalesced
+        into one redraw, which is skipped if none of the drawing inputs changed.
+        """
+        if not (self.x_axis_var.get() and self.y_axis_listbox.curselection() and self.df is not None): return
+        if self.pending_redraw is not None:
+            self.master.after_cancel(self.pending_redraw)
+        self.pending_redraw = self.master.after(self.redraw_delay_ms, self.run_scheduled_redraw)
+
+    def run_scheduled_redraw(self):
+        """Redraw the graph for the changes collected by trigger_redraw_if_possible."""
+        self.pending_redraw = None
+        if not (self.x_axis_var.get() and self.y_axis_listbox.curselection() and self.df is not None): return
+        if self.current_fig is not None and self.draw_inputs_signature() == self.last_draw_signature: return
+        self.draw_graph(live=True)
+
+    def draw_inputs_signature(self):
+        """Return a value that changes whenever anything draw_graph reads changes."""
+        return (id(self.df), tuple(self.df.columns) if self.df is not None else None,
+                self.x_axis_var.get(), tuple(self.y_axis_listbox.curselection()),
+                tuple((name, var.get()) for name, var in self.legend_label_vars.items()),
+                self.start_row_var.get(), self.end_row_var.get(),
+                self.x_min_var.get(), self.x_max_var.get(), self.y_min_var.get(), self.y_max_var.get(),
+                self.graph_title_var.get(), self.x_axis_label_var.get(), self.y_axis_label_var.get(),
+                self.legend_loc_var.get(), self.aspect_ratio_var.get(), self.global_fontsize_var.get(),
+                self.plot_bg_color_var.get(), self.figure_bg_color_var.get(),
+                self.grid_visible_var.get(), self.grid_color_var.get(), self.grid_linestyle_var.get(), self.grid_linewidth_var.get(),
+                self.detect_maxima_var.get(), self.detect_minima_var.get(), self.decimation_enabled_var.get(), self.panel_mode_var.get(),
+                tuple((item['x_var'].get(), item['name_var'].get(), item['color_var'].get(), item['linewidth_var'].get())
+                      for item in self.vline_configs))
     def update_default_graph_title(self):
         """Set a basic graph title based on selected axes."""
         selected_x = self.x_axis_var.get(); selected_y_indices = self.y_axis_listbox.curselection()
@@ -1451,8 +1788,8 @@ class BioGraphApp:
 
     def on_mouse_scroll(self, event):
         """Zoom the plot in or out with the mouse wheel."""
-        if event.inaxes and self.current_fig:
-            ax = self.current_fig.gca()
+        if event.inaxes and self.current_fig and event.inaxes in self.panel_axes:
+            ax = event.inaxes
             cur_xlim = ax.get_xlim()
             cur_ylim = ax.get_ylim()
             xdata = event.xdata
@@ -1460,6 +1797,9 @@ class BioGraphApp:
 
             if xdata is None or ydata is None:
                 return
+            if event.button not in ('up', 'down'):
+                return
+            self.begin_interaction()
 
             zoom_factor = 1.1
             
@@ -1481,8 +1821,116 @@ class BioGraphApp:
             ax.set_ylim([ydata - new_height * (1-rely), ydata + new_height * (rely)])
             self.canvas_widget.draw_idle()
 
-    def draw_graph(self):
-        """Draw the graph using the current selections and settings."""
+    def decimate_line(self, x_values, y_values, x_range, pixels, preview=False):
+        """Return the points of a line to draw for the given X range and axes width in pixels.
+
+        ``preview`` returns a coarser line, even with decimation switched off,
+        for use while the view is being zoomed or panned.
+        """
+        if preview:
+            return decimate_for_view(x_values, y_values, x_range, pixels * self.preview_detail)
+        if not self.decimation_enabled_var.get():
+            return x_values, y_values
+        return decimate_for_view(x_values, y_values, x_range, pixels)
+
+    def update_decimated_lines(self, ax=None, pixels=None, x_range=None, preview=False):
+        """Re-decimate every plotted line from its full-resolution data for ``x_range`` (default: the current X range)."""
+        if self.current_fig is None or not self.line_source_data or not self.panel_axes: return
+        # Panels share the X axis, so the first one stands for all of them.
+        ax = ax or self.panel_axes[0]
+        pixels = pixels or ax.get_window_extent().width
+        x_range = x_range or tuple(ax.get_xlim())
+        self.decimated_view = (x_range, pixels, preview)
+        for line, (x_values, y_values) in self.line_source_data.items():
+            line.set_data(*self.decimate_line(x_values, y_values, x_range, pixels, preview))
+
+    def on_xlim_changed(self, ax):
+        """Refresh the decimated lines after zooming or panning (mouse wheel or toolbar)."""
+        pixels = ax.get_window_extent().width
+        if self.decimated_view == (tuple(ax.get_xlim()), pixels, self.interacting): return
+        self.update_decimated_lines(ax, pixels, preview=self.interacting)
+
+    def begin_interaction(self, settle=True):
+        """Render previews while the view is being zoomed or panned.
+
+        With ``settle`` the full-quality render is scheduled for when no
+        further interaction arrives within ``interaction_settle_ms``.
+        """
+        if not self.interacting:
+            self.interacting = True
+            for line in self.line_source_data: line.set_antialiased(False)
+        if self.pending_full_render is not None:
+            self.master.after_cancel(self.pending_full_render); self.pending_full_render = None
+        if settle:
+            self.pending_full_render = self.master.after(self.interaction_settle_ms, self.end_interaction)
+
+    def end_interaction(self):
+        """Render the current view at full quality once zooming or panning has stopped."""
+        self.pending_full_render = None
+        if not self.interacting: return
+        self.interacting = False
+        if self.current_fig is None: return
+        for line in self.line_source_data: line.set_antialiased(True)
+        self.update_decimated_lines()
+        if self.canvas_widget: self.canvas_widget.draw_idle()
+
+    def on_mouse_press(self, event):
+        """Start preview rendering when a toolbar pan drag begins."""
+        if self.toolbar and self.toolbar.mode == 'pan/zoom' and event.inaxes:
+            self.begin_interaction(settle=False)
+
+    def on_mouse_release(self, event):
+        """Schedule the full-quality render after a toolbar pan drag."""
+        if self.interacting and self.pending_full_render is None:
+            self.begin_interaction()
+
+    def save_figure(self, target, **savefig_kwargs):
+        """Save the current figure using the export settings.
+
+        The data lines are drawn from their full-resolution data, decimated
+        for the output resolution when export decimation is on, and rasterized
+        at ``export_dpi`` when line rasterization is on. Axes, text and markers
+        stay vector in PDF output.
+        """
+        # Panel mode without numeric Y columns has no axes (and no lines) to re-decimate.
+        ax = self.panel_axes[0] if self.panel_axes else None
+        if ax is not None:
+            screen_pixels = ax.get_window_extent().width
+            export_pixels = screen_pixels * self.export_dpi / self.current_fig.dpi
+            x_range = tuple(ax.get_xlim())
+            for line, (x_values, y_values) in self.line_source_data.items():
+                line.set_data(*(decimate_for_view(x_values, y_values, x_range, export_pixels) if self.export_decimate else (x_values, y_values)))
+                line.set_rasterized(self.export_rasterize_lines)
+        try:
+            self.current_fig.savefig(target, dpi=self.export_dpi, **savefig_kwargs)
+        finally:
+            if ax is not None:
+                for line in self.line_source_data: line.set_rasterized(False)
+                self.update_decimated_lines(ax, screen_pixels)
+
+    def parse_axis_limits(self, live=False):
+        """Return ``{field: float or None}`` for the axis range fields, or None if one is not a number.
+
+        During a live redraw a field that does not parse yet (such as "-" or
+        "1e" while typing) keeps its last valid limit instead.
+        """
+        limits = {}
+        for name, var in (("x_min", self.x_min_var), ("x_max", self.x_max_var), ("y_min", self.y_min_var), ("y_max", self.y_max_var)):
+            text = var.get().strip()
+            try:
+                limits[name] = float(text) if text else None
+            except ValueError:
+                if not live: return None
+                limits[name] = self.last_axis_limits.get(name)
+        self.last_axis_limits = limits
+        return limits
+
+    def draw_graph(self, live=False):
+        """Draw the graph using the current selections and settings.
+
+        ``live`` is set for the debounced redraws while typing; they skip
+        axis range fields that are not numbers yet instead of warning.
+        """
         selected_x_column = self.x_axis_var.get()
         selected_y_indices = self.y_axis_listbox.curselection()
         if not selected_x_column: messagebox.showwarning("警告", "X軸データ列を選択してください.", parent=self.master); return
@@ -1518,100 +1966,114 @@ class BioGraphApp:
                 else:
                     if end_idx > len(current_df): end_idx = len(current_df)
                     row_slice = slice(None, end_idx)
-            self.sliced_df = current_df.iloc[row_slice].copy()
+            # A view of the current sheet; Copy-on-Write protects it from later changes.
+            self.sliced_df = current_df.iloc[row_slice]
+            self.sliced_rows = row_slice.indices(len(current_df))[:2]
+            self.sliced_source = (current_df, self.df_generation)
             if self.sliced_df.empty: messagebox.showwarning("警告", "指定された行範囲にデータがありません。", parent=self.master); self.sliced_df = None; return
         except ValueError: messagebox.showerror("エラー", "開始行または終了行には数値を入力してください。", parent=self.master); self.sliced_df = None; return
         except Exception as e: messagebox.showerror("エラー", f"データ範囲の処理中にエラー: {e}", parent=self.master); self.sliced_df = None; return
 
-        if self.canvas_widget: self.canvas_widget.get_tk_widget().destroy()
-        if self.toolbar: self.toolbar.destroy(); self.toolbar = None
         if self.initial_graph_label: self.initial_graph_label.destroy(); self.initial_graph_label = None
 
-        fig_size = self.get_figure_size()
-        self.current_fig = Figure(figsize=fig_size, dpi=100)
-        self.current_fig.patch.set_facecolor(self.figure_bg_color_var.get())
-        ax = self.current_fig.add_subplot(111); ax.clear()
-        ax.set_facecolor(self.plot_bg_color_var.get())
-        self.plotted_lines.clear()
-
         try:
+            panel_mode = self.panel_mode_var.get()
+            fig_size = self.get_figure_size()
+            if panel_mode:
+                fig_size = (fig_size[0], max(fig_size[1], self.panel_height_inches * len(selected_y_columns_original)))
+            self.prepare_figure(fig_size, panel_mode)
+            self.current_fig.patch.set_facecolor(self.figure_bg_color_var.get())
+            self.remove_overlay_artists()
+
             x_data = self.sliced_df[selected_x_column]
-            for y_col_original in selected_y_columns_original:
-                y_data = self.sliced_df[y_col_original]
-                if not pd.api.types.is_numeric_dtype(x_data): messagebox.showerror("エラー", f"X軸の列 '{selected_x_column}' は数値データではありません。", parent=self.master); self.sliced_df=None; return
-                if not pd.api.types.is_numeric_dtype(y_data): messagebox.showwarning("警告", f"Y軸の列 '{y_col_original}' は数値データではありません。スキップします。", parent=self.master); continue
+            if not pd.api.types.is_numeric_dtype(x_data): messagebox.showerror("エラー", f"X軸の列 '{selected_x_column}' は数値データではありません。", parent=self.master); self.sliced_df=None; self.discard_figure(); return
+            self.sync_plot_lines(current_df, row_slice, selected_x_column, selected_y_columns_original, panel_mode)
+            axes_list = self.panel_axes
+
+            self.plotted_lines.clear()
+            for y_col_original, line in self.column_lines.items():
                 legend_name_to_use = plot_labels.get(y_col_original, y_col_original)
-                line, = ax.plot(x_data, y_data, label=legend_name_to_use)
+                line.set_label(legend_name_to_use)
                 self.plotted_lines[legend_name_to_use] = line
+            for ax in axes_list:
+                ax.set_facecolor(self.plot_bg_color_var.get())
+                ax.relim()
+                ax.autoscale(enable=True)
 
+            # The extrema come from the per-column range index (except in 大容量モード), so changing the row range does not rescan the data.
+            start_row, stop_row = self.sliced_rows
             if self.detect_maxima_var.get():
                 for y_col_original in selected_y_columns_original:
-                    if y_col_original in self.sliced_df and pd.api.types.is_numeric_dtype(self.sliced_df[y_col_original]):
-                        y_series = self.sliced_df[y_col_original].dropna()
-                        if not y_series.empty:
-                            try:
-                                idx_max = y_series.idxmax()
-                                if pd.notnull(idx_max) and idx_max in self.sliced_df.index:
-                                     x_at_max = self.sliced_df.loc[idx_max, selected_x_column]
-                                     y_at_max = y_series.loc[idx_max]
-                                     ax.scatter(x_at_max, y_at_max, color='red', marker='o', s=50, zorder=5)
-                            except Exception as e_max:
-                                print(f"Error plotting maxima for {y_col_original}: {e_max}")
+                    if y_col_original in self.column_lines:
+                        try:
+                            row_max = self.statistics_cache.ranges.extremum_row(self.current_sheet_name, current_df, y_col_original,
+                                                                                  start_row, stop_row, largest=True)
+                            if row_max is not None:
+                                x_at_max = current_df[selected_x_column].iloc[row_max]
+                                y_at_max = current_df[y_col_original].iloc[row_max]
+                                self.overlay_artists.append(self.column_lines[y_col_original].axes.scatter(x_at_max, y_at_max, color='red', marker='o', s=50, zorder=5))
+                        except Exception as e_max:
+                            print(f"Error plotting maxima for {y_col_original}: {e_max}")
 
 
             if self.detect_minima_var.get():
                 for y_col_original in selected_y_columns_original:
-                    if y_col_original in self.sliced_df and pd.api.types.is_numeric_dtype(self.sliced_df[y_col_original]):
-                        y_series = self.sliced_df[y_col_original].dropna()
-                        if not y_series.empty:
-                            try:
-                                idx_min = y_series.idxmin()
-                                if pd.notnull(idx_min) and idx_min in self.sliced_df.index:
-                                    x_at_min = self.sliced_df.loc[idx_min, selected_x_column]
-                                    y_at_min = y_series.loc[idx_min]
-                                    ax.scatter(x_at_min, y_at_min, color='blue', marker='o', s=50, zorder=5)
-                            except Exception as e_min:
-                                print(f"Error plotting minima for {y_col_original}: {e_min}")
+                    if y_col_original in self.column_lines:
+                        try:
+                            row_min = self.statistics_cache.ranges.extremum_row(self.current_sheet_name, current_df, y_col_original,
+                                                                                  start_row, stop_row, largest=False)
+                            if row_min is not None:
+                                x_at_min = current_df[selected_x_column].iloc[row_min]
+                                y_at_min = current_df[y_col_original].iloc[row_min]
+                                self.overlay_artists.append(self.column_lines[y_col_original].axes.scatter(x_at_min, y_at_min, color='blue', marker='o', s=50, zorder=5))
+                        except Exception as e_min:
+                            print(f"Error plotting minima for {y_col_original}: {e_min}")
 
 
             for vline_config_item in self.vline_configs:
                 x_val_str = vline_config_item['x_var'].get(); name_val = vline_config_item['name_var'].get()
                 color_val = vline_config_item['color_var'].get(); linewidth_val = vline_config_item['linewidth_var'].get()
-                if x_val_str:
+                if x_val_str and axes_list:
                     try:
                         x_coord = float(x_val_str)
-                        ax.axvline(x=x_coord, color=color_val, linewidth=linewidth_val, linestyle='--')
+                        for ax in axes_list:
+                            self.overlay_artists.append(ax.axvline(x=x_coord, color=color_val, linewidth=linewidth_val, linestyle='--'))
                         if name_val:
+                            ax = axes_list[0]
                             y_min, y_max = ax.get_ylim(); text_y_position = y_min + (y_max - y_min) * 0.9
                             x_min, x_max = ax.get_xlim(); text_x_offset = (x_max - x_min) * 0.01
-                            ax.text(x_coord + text_x_offset, text_y_position, name_val, color=color_val, fontsize=base_fontsize -1, ha='left', va='center') # マーカー名もフォントサイズ適用
+                            self.overlay_artists.append(ax.text(x_coord + text_x_offset, text_y_position, name_val, color=color_val, fontsize=base_fontsize -1, ha='left', va='center')) # マーカー名もフォントサイズ適用
                     except ValueError: messagebox.showwarning("警告", f"マーカーのX座標 '{x_val_str}' は数値である必要があります。", parent=self.master)
                     except Exception as e_v: messagebox.showwarning("警告", f"マーカー '{name_val}' の描画中にエラー: {e_v}", parent=self.master)
 
-            x_min_str = self.x_min_var.get().strip(); x_max_str = self.x_max_var.get().strip()
-            y_min_str = self.y_min_var.get().strip(); y_max_str = self.y_max_var.get().strip()
-            try:
-                x_min = float(x_min_str) if x_min_str else None
-                x_max = float(x_max_str) if x_max_str else None
-                y_min = float(y_min_str) if y_min_str else None
-                y_max = float(y_max_str) if y_max_str else None
-                if any(v is not None for v in [x_min, x_max]):
-                    ax.set_xlim(left=x_min, right=x_max)
-                if any(v is not None for v in [y_min, y_max]):
-                    ax.set_ylim(bottom=y_min, top=y_max)
-            except ValueError:
+            axis_limits = self.parse_axis_limits(live)
+            if axis_limits is None:
                 messagebox.showwarning("警告", "軸範囲には数値を入力してください。", parent=self.master)
+            else:
+                x_min, x_max, y_min, y_max = axis_limits["x_min"], axis_limits["x_max"], axis_limits["y_min"], axis_limits["y_max"]
+                for ax in axes_list:
+                    if any(v is not None for v in [x_min, x_max]):
+                        ax.set_xlim(left=x_min, right=x_max)
+                    if any(v is not None for v in [y_min, y_max]):
+                        ax.set_ylim(bottom=y_min, top=y_max)
 
             # フォントサイズ適用
-            ax.set_title(graph_title, fontsize=base_fontsize + 2)
-            ax.set_xlabel(x_label, fontsize=base_fontsize)
-            ax.set_ylabel(y_label, fontsize=base_fontsize)
-            ax.tick_params(axis='x', labelsize=base_fontsize -1)
-            ax.tick_params(axis='y', labelsize=base_fontsize -1)
-
+            panel_columns = {ax: col for col, ax in self.column_axes.items()}
+            for ax in axes_list:
+                ax.set_title(graph_title if ax is axes_list[0] else "", fontsize=base_fontsize + 2)
+                ax.set_xlabel(x_label if ax is axes_list[-1] else "", fontsize=base_fontsize)
+                if panel_mode:
+                    # Each panel is labelled with its channel; only the bottom panel shows X tick labels.
+                    ax.set_ylabel(plot_labels.get(panel_columns[ax], panel_columns[ax]), fontsize=base_fontsize - 1)
+                    ax.tick_params(axis='x', labelbottom=ax is axes_list[-1])
+                else:
+                    ax.set_ylabel(y_label, fontsize=base_fontsize)
+                ax.tick_params(axis='x', labelsize=base_fontsize -1)
+                ax.tick_params(axis='y', labelsize=base_fontsize -1)
 
-            if selected_y_columns_original and ax.get_lines():
-                legend = ax.legend(loc=legend_loc_code, fontsize=base_fontsize -1) # 凡例にもフォントサイズ適用
+                if ax.get_legend(): ax.get_legend().remove()
+            if not panel_mode and selected_y_columns_original and self.plotted_lines:
+                legend = axes_list[0].legend(loc=legend_loc_code, fontsize=base_fontsize -1) # 凡例にもフォントサイズ適用
                 if legend:
                     for legline, legtext in zip(legend.get_lines(), legend.get_texts()):
                         label_of_legtext = legtext.get_text()
@@ -1623,78 +2085,264 @@ class BioGraphApp:
                             else:
                                 legline.set_alpha(0.2)
 
-            if self.grid_visible_var.get():
-                grid_linestyle_key = self.grid_linestyle_var.get() # これは表示名（例：「実線」）
-                grid_linestyle_str = self.grid_linestyle_choices.get(grid_linestyle_key, '-') # Matplotlibスタイルへ変換
-                ax.grid(True, color=self.grid_color_var.get(), linestyle=grid_linestyle_str, linewidth=self.grid_linewidth_var.get())
-            else:
-                ax.grid(False)
-            
-            self.current_fig.tight_layout()
+            for ax in axes_list:
+                if self.grid_visible_var.get():
+                    grid_linestyle_key = self.grid_linestyle_var.get() # これは表示名（例：「実線」）
+                    grid_linestyle_str = self.grid_linestyle_choices.get(grid_linestyle_key, '-') # Matplotlibスタイルへ変換
+                    ax.grid(True, color=self.grid_color_var.get(), linestyle=grid_linestyle_str, linewidth=self.grid_linewidth_var.get())
+                else:
+                    ax.grid(False)
 
-            self.canvas_widget = FigureCanvasTkAgg(self.current_fig, master=self.graph_display_frame)
-            self.canvas_widget.draw()
-            self.canvas_widget.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+            self.apply_layout(axes_list, base_fontsize, graph_title, x_label, legend_loc_code, panel_mode)
+            self.update_decimated_lines()
 
-            if self.toolbar: self.toolbar.destroy()
-            self.toolbar = NavigationToolbar2Tk(self.canvas_widget, self.graph_display_frame)
+            self.canvas_widget.draw_idle()
+            # The plotted view is the new "home" of the toolbar.
             self.toolbar.update()
-
-            self.current_fig.canvas.mpl_connect('motion_notify_event', self.on_mouse_motion)
-            self.current_fig.canvas.mpl_connect('pick_event', self.on_legend_pick)
-            self.current_fig.canvas.mpl_connect('scroll_event', self.on_mouse_scroll)
-
+            self.last_draw_signature = self.draw_inputs_signature()
 
             self.save_graph_button.config(state="normal"); self.create_table_button.config(state="normal")
-        except KeyError as e: messagebox.showerror("エラー", f"選択された列が見つかりません: {e}", parent=self.master); self.current_fig=None; self.sliced_df=None; self.save_graph_button.config(state="disabled"); self.create_table_button.config(state="disabled")
-        except Exception as e: messagebox.showerror("エラー", f"グラフの描画中にエラーが発生しました:\n{e}", parent=self.master); self.current_fig=None; self.sliced_df=None; self.save_graph_button.config(state="disabled"); self.create_table_button.config(state="disabled")
+        except KeyError as e: messagebox.showerror("エラー", f"選択された列が見つかりません: {e}", parent=self.master); self.discard_figure(); self.sliced_df=None; self.save_graph_button.config(state="disabled"); self.create_table_button.config(state="disabled")
+        except Exception as e: messagebox.showerror("エラー", f"グラフの描画中にエラーが発生しました:\n{e}", parent=self.master); self.discard_figure(); self.sliced_df=None; self.save_graph_button.config(state="disabled"); self.create_table_button.config(state="disabled")
+
+    def sync_plot_lines(self, source_df, row_slice, x_column, y_columns, panel_mode):
+        """Make the plotted lines (and panels) match the selected columns.
+
+        Lines are rebuilt when the sheet, the X column or the row range change.
+        On one axes all lines are replotted when the Y selection changes so
+        colors follow the selection order. In panel mode each column has its
+        own axes sharing the X axis; panels of columns that stay selected keep
+        their line and are only moved, so adding or removing a channel renders
+        just that panel.
+        """
+        data_key = (row_slice, x_column)
+        selection_changed = tuple(y_columns) != self.plot_columns
+        if self.plot_data_source is not source_df or self.plot_data_key != data_key:
+            for col in list(self.column_lines): self.remove_column_line(col)
+            self.plot_data_source = source_df; self.plot_data_key = data_key; selection_changed = True
+        elif selection_changed and not panel_mode:
+            for col in list(self.column_lines): self.remove_column_line(col)
+        self.plot_columns = tuple(y_columns)
+
+        numeric_columns = []
+        for y_col_original in y_columns:
+            if pd.api.types.is_numeric_dtype(self.sliced_df[y_col_original]): numeric_columns.append(y_col_original)
+            elif selection_changed: messagebox.showwarning("警告", f"Y軸の列 '{y_col_original}' は数値データではありません。スキップします。", parent=self.master)
+
+        x_values = None
+        if panel_mode:
+            for col in [col for col in self.column_axes if col not in numeric_columns]:
+                if col in self.column_lines: self.remove_column_line(col)
+                self.column_axes.pop(col).remove()
+            if numeric_columns:
+                grid = self.current_fig.add_gridspec(len(numeric_columns), 1)
+                shared_ax = next(iter(self.column_axes.values()), None)
+                for position, col in enumerate(numeric_columns):
+                    ax = self.column_axes.get(col)
+                    if ax is None:
+                        ax = self.current_fig.add_subplot(grid[position, 0], sharex=shared_ax)
+                        ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+                        self.column_axes[col] = ax; shared_ax = shared_ax or ax
+                    else:
+                        ax.set_subplotspec(grid[position, 0])
+            self.panel_axes = [self.column_axes[col] for col in numeric_columns]
+        elif not self.column_lines:
+            self.panel_axes[0].set_prop_cycle(None)
+
+        for y_col_original in numeric_columns:
+            if y_col_original in self.column_lines: continue
+            if x_values is None: x_values = self.sliced_df[x_column].to_numpy(dtype=np.float64, na_value=np.nan)
+            y_values = self.sliced_df[y_col_original].to_numpy(dtype=np.float64, na_value=np.nan)
+            ax = self.column_axes[y_col_original] if panel_mode else self.panel_axes[0]
+            line, = ax.plot(*self.decimate_line(x_values, y_values, None, ax.get_window_extent().width))
+            self.column_lines[y_col_original] = line
+            self.line_source_data[line] = (x_values, y_values)
+        # Zooming may have cropped the kept lines; restore the full range before autoscaling.
+        self.update_decimated_lines(x_range=(-np.inf, np.inf))
+
+    def remove_column_line(self, column):
+        """Remove the plotted line of a column."""
+        line = self.column_lines.pop(column)
+        line.remove()
+        self.line_source_data.pop(line, None); self.point_indexes.pop(line, None)
+        self.decimated_view = None
+
+    def apply_layout(self, axes_list, base_fontsize, graph_title, x_label, legend_loc_code, panel_mode):
+        """Apply tight_layout, reusing the result of an earlier draw with the same layout inputs.
+
+        tight_layout measures every text around the axes, which is a large part
+        of a redraw. Its result only depends on the figure size, the font size,
+        the title, axis labels, the width of the Y tick labels and the legend
+        location, so the subplot parameters are cached under those and applied
+        directly when only the data or the styling changed.
+        """
+        tick_label_widths = []
+        for ax in axes_list:
+            labels = ax.yaxis.get_major_formatter().format_ticks(ax.get_yticks())
+            tick_label_widths.append(max((len(label) for label in labels), default=0))
+        key = (tuple(self.current_fig.get_size_inches().round(3)), base_fontsize, graph_title, x_label, legend_loc_code, panel_mode,
+               tuple(ax.get_ylabel() for ax in axes_list), tuple(tick_label_widths))
+        params = self.layout_cache.get(key)
+        if params is not None:
+            self.current_fig.subplots_adjust(**params)
+            return
+        self.current_fig.tight_layout()
+        subplotpars = self.current_fig.subplotpars
+        params = {name: getattr(subplotpars, name) for name in ('left', 'right', 'bottom', 'top', 'wspace', 'hspace')}
+        if len(self.layout_cache) >= self.layout_cache_size:
+            self.layout_cache.pop(next(iter(self.layout_cache)))
+        self.layout_cache[key] = params
+
+    def prepare_figure(self, fig_size, panel_mode=False):
+        """Create the long-lived figure, canvas and toolbar on first use, or when the panel mode changes.
+
+        The figure is reused by later draws; only its size is updated when the
+        aspect ratio changes. Without panel mode the figure has a single axes.
+        """
+        if self.current_fig is not None and self.canvas_widget is not None and self.canvas_widget.figure is self.current_fig and self.current_panel_mode == panel_mode:
+            if fig_size != self.current_fig_size:
+                self.current_fig.set_size_inches(fig_size, forward=False)
+                self.canvas_widget.get_tk_widget().config(width=int(fig_size[0] * self.current_fig.dpi), height=int(fig_size[1] * self.current_fig.dpi))
+                self.current_fig_size = fig_size
+            return
+
+        self.discard_figure()
+        self.current_fig = Figure(figsize=fig_size, dpi=100)
+        self.current_fig_size = fig_size
+        self.current_panel_mode = panel_mode
+        if not panel_mode:
+            ax = self.current_fig.add_subplot(111)
+            ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+            self.panel_axes = [ax]
+        self.create_hover_artists()
+
+        self.canvas_widget = FigureCanvasTkAgg(self.current_fig, master=self.graph_display_frame)
+        self.canvas_widget.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.toolbar = NavigationToolbar2Tk(self.canvas_widget, self.graph_display_frame)
+
+        self.current_fig.canvas.mpl_connect('motion_notify_event', self.on_mouse_motion)
+        self.current_fig.canvas.mpl_connect('pick_event', self.on_legend_pick)
+        self.current_fig.canvas.mpl_connect('scroll_event', self.on_mouse_scroll)
+        self.current_fig.canvas.mpl_connect('draw_event', self.on_canvas_draw)
+        self.current_fig.canvas.mpl_connect('button_press_event', self.on_mouse_press)
+        self.current_fig.canvas.mpl_connect('button_release_event', self.on_mouse_release)
+
+    def discard_figure(self):
+        """Destroy the figure, its canvas and toolbar so the next draw starts from scratch."""
+        if self.canvas_widget: self.canvas_widget.get_tk_widget().destroy(); self.canvas_widget = None
+        if self.toolbar: self.toolbar.destroy(); self.toolbar = None
+        self.current_fig = None; self.current_fig_size = None; self.current_panel_mode = None
+        self.panel_axes = []; self.column_axes.clear(); self.plot_columns = None
+        self.plotted_lines.clear(); self.column_lines.clear(); self.line_source_data.clear(); self.point_indexes.clear()
+        self.overlay_artists = []; self.tooltip_annotation = None; self.crosshair_lines = []; self.hover_axes = None; self.hover_background = None
+        self.plot_data_source = None; self.plot_data_key = None; self.decimated_view = None
+        self.last_draw_signature = None
+        if self.pending_full_render is not None:
+            self.master.after_cancel(self.pending_full_render); self.pending_full_render = None
+        self.interacting = False
+
+    def remove_overlay_artists(self):
+        """Remove the extremum markers and vertical markers drawn by the previous draw and hide the tooltip."""
+        for artist in self.overlay_artists:
+            artist.remove()
+        self.overlay_artists = []
+        self.hide_hover_artists()
+
+    def create_hover_artists(self):
+        """Create the tooltip and crosshair; they are animated, so full draws skip them and they are blitted.
+
+        They belong to the figure rather than an axes, so they never affect
+        autoscaling and can follow the cursor from panel to panel.
+        """
+        self.tooltip_annotation = Annotation("", xy=(0, 0), xytext=(10, 10), textcoords="offset points",
+                                             bbox=dict(boxstyle="round,pad=0.4", fc="lightyellow", alpha=0.8, ec="gray"),
+                                             arrowprops=dict(arrowstyle="->", connectionstyle="arc3,rad=.2", color='gray'),
+                                             animated=True, visible=False)
+        self.current_fig.add_artist(self.tooltip_annotation)
+        self.crosshair_lines = []
+        for _ in range(2):
+            line = mlines.Line2D([], [], color='gray', linewidth=0.8, linestyle=':', animated=True, visible=False)
+            self.current_fig.add_artist(line)
+            self.crosshair_lines.append(line)
+
+    def attach_hover_artists(self, ax):
+        """Move the tooltip and crosshair to the axes under the cursor."""
+        if self.hover_axes is ax: return
+        self.hover_axes = ax
+        self.tooltip_annotation.xycoords = ax.transData
+        vertical, horizontal = self.crosshair_lines
+        vertical.set_transform(ax.get_xaxis_transform()); horizontal.set_transform(ax.get_yaxis_transform())
+        for line in self.crosshair_lines:
+            line.set_clip_path(ax.patch)
+
+    def hide_hover_artists(self):
+        """Hide the tooltip and crosshair; return True if any of them was shown."""
+        shown = False
+        for artist in [self.tooltip_annotation] + self.crosshair_lines:
+            if artist is not None and artist.get_visible():
+                artist.set_visible(False); shown = True
+        return shown
+
+    def on_canvas_draw(self, event):
+        """Cache the freshly drawn figure as the background for the hover layer."""
+        if self.canvas_widget is None or event.canvas is not self.canvas_widget: return
+        self.hover_background = self.canvas_widget.copy_from_bbox(self.current_fig.bbox)
+        self.blit_hover_artists(restore=False)
+
+    def blit_hover_artists(self, restore=True):
+        """Redraw only the tooltip and crosshair over the cached background."""
+        if self.canvas_widget is None or self.hover_background is None: return
+        if restore: self.canvas_widget.restore_region(self.hover_background)
+        for artist in self.crosshair_lines + [self.tooltip_annotation]:
+            if artist is not None and artist.get_visible():
+                self.current_fig.draw_artist(artist)
+        self.canvas_widget.blit(self.current_fig.bbox)
+
+    def find_nearest_point(self, ax, px, py, radius):
+        """Return ``(line, x, y)`` of the full-resolution sample nearest to display point (px, py) within ``radius`` pixels."""
+        view_key = (tuple(ax.viewLim.bounds), tuple(ax.bbox.bounds))
+        closest_line_info = None; min_dist_sq = float('inf')
+        for line, (x_values, y_values) in self.line_source_data.items():
+            if not line.get_visible() or line.axes is not ax: continue
+            index = self.point_indexes.get(line)
+            if index is None:
+                index = self.point_indexes[line] = NearestPointIndex(x_values, y_values)
+            found = index.nearest(ax.transData, view_key, px, py, radius)
+            if found and found[1] < min_dist_sq:
+                row, min_dist_sq = found
+                closest_line_info = (line, x_values[row], y_values[row])
+        return closest_line_info
 
     def on_mouse_motion(self, event):
-        """Show a tooltip with values when the cursor hovers near data."""
-        if self.current_fig and event.inaxes == self.current_fig.gca():
-            ax = self.current_fig.gca()
-            if self.tooltip_annotation:
-                self.tooltip_annotation.remove()
-                self.tooltip_annotation = None
-
-            min_dist_sq = float('inf')
-            closest_line_info = None
-
-            for line in ax.get_lines():
-                if not line.get_visible() or not hasattr(line, 'get_xdata'): continue
-
-                xdata, ydata = line.get_data()
-                if len(xdata) == 0: continue
-
-                for i in range(len(xdata)):
-                    point_display_coords = ax.transData.transform_point((xdata[i], ydata[i]))
-                    dist_sq = (point_display_coords[0] - event.x)**2 + (point_display_coords[1] - event.y)**2
-                    if dist_sq < min_dist_sq:
-                        min_dist_sq = dist_sq
-                        closest_line_info = (line, xdata[i], ydata[i])
-
-            if closest_line_info and min_dist_sq < 20**2:
-                line, x_val, y_val = closest_line_info
-                text = f"{line.get_label()}\nX: {x_val:.3f}\nY: {y_val:.3f}"
-                self.tooltip_annotation = ax.annotate(text,
-                                                      xy=(x_val, y_val),
-                                                      xytext=(10, 10),
-                                                      textcoords="offset points",
-                                                      bbox=dict(boxstyle="round,pad=0.4", fc="lightyellow", alpha=0.8, ec="gray"),
-                                                      arrowprops=dict(arrowstyle="->", connectionstyle="arc3,rad=.2", color='gray'))
-                if self.canvas_widget: self.canvas_widget.draw_idle()
-        elif self.tooltip_annotation:
-            self.tooltip_annotation.remove()
-            self.tooltip_annotation = None
-            if self.canvas_widget: self.canvas_widget.draw_idle()
+        """Show a crosshair, and a tooltip with values when the cursor hovers near data."""
+        if self.current_fig is None or self.tooltip_annotation is None: return
+        ax = event.inaxes
+        if ax is None or ax not in self.panel_axes:
+            if self.hide_hover_artists(): self.blit_hover_artists()
+            return
+
+        self.attach_hover_artists(ax)
+        vertical, horizontal = self.crosshair_lines
+        vertical.set_data([event.xdata, event.xdata], [0, 1]); vertical.set_visible(True)
+        horizontal.set_data([0, 1], [event.ydata, event.ydata]); horizontal.set_visible(True)
+
+        closest_line_info = self.find_nearest_point(ax, event.x, event.y, radius=20)
+        if closest_line_info:
+            line, x_val, y_val = closest_line_info
+            self.tooltip_annotation.set_text(f"{line.get_label()}\nX: {x_val:.3f}\nY: {y_val:.3f}")
+            self.tooltip_annotation.xy = (x_val, y_val)
+            self.tooltip_annotation.set_visible(True)
+        else:
+            self.tooltip_annotation.set_visible(False)
+        self.blit_hover_artists()
 
 
     def on_legend_pick(self, event):
         """Toggle line visibility when its legend entry is clicked."""
         leg_artist = event.artist
         if not self.current_fig: return
-        ax = self.current_fig.gca()
-        legend = ax.get_legend()
+        # Only the single-axes view has a legend.
+        legend = self.panel_axes[0].get_legend() if self.panel_axes else None
         if not legend: return
 
         clicked_legend_label = None
@@ -1728,10 +2376,54 @@ class BioGraphApp:
         file_path = filedialog.asksaveasfilename(title="グラフを保存", defaultextension=".png", filetypes=(("PNGファイル", "*.png"), ("PDFファイル", "*.pdf"), ("すべてのファイル", "*.*")))
         if not file_path: return
         try:
-            self.current_fig.savefig(file_path, bbox_inches='tight', dpi=300)
+            self.save_figure(file_path, bbox_inches='tight')
             messagebox.showinfo("成功", f"グラフを {file_path} に保存しました。", parent=self.master)
         except Exception as e: messagebox.showerror("エラー", f"グラフの保存に失敗しました:\n{e}", parent=self.master)
 
+    def export_all_sheets(self):
+        """Render every sheet of the open file with the current settings into a chosen folder.
+
+        The sheets are rendered on the Agg backend in worker processes (see
+        :func:`batch_render.export_sheets`), so the on-screen figure is not
+        touched and the window stays responsive while progress is shown.
+        """
+        if not isinstance(self.df_dict, LazySheetStore) or not self.x_axis_var.get() or not self.y_axis_listbox.curselection():
+            messagebox.showwarning("警告", "ファイルを読み込み、X軸とY軸を選択してください。", parent=self.master); return
+        output_dir = filedialog.askdirectory(title="書き出し先フォルダを選択", parent=self.master)
+        if not output_dir: return
+        use_pdf = messagebox.askyesnocancel("書き出し形式", "PDFで書き出しますか？\n(「いいえ」を選ぶとPNGで書き出します)", parent=self.master)
+        if use_pdf is None: return
+
+        settings = self.collect_current_settings()
+        for marker, item in zip(settings['vline_markers'], self.vline_configs):
+            marker['x'] = item['x_var'].get()
+        settings.update(start_row=self.start_row_var.get(), end_row=self.end_row_var.get(),
+                        detect_maxima=self.detect_maxima_var.get(), detect_minima=self.detect_minima_var.get(),
+                        rasterize_lines=self.export_rasterize_lines, decimate_lines=self.export_decimate)
+        filepath = self.df_dict.filepath
+        sheet_names = list(self.df_dict.sheet_names)
+        derived_columns = {name: dict(columns) for name, columns in self.derived_columns.items() if columns}
+        image_format = "pdf" if use_pdf else "png"
+        dpi = self.export_dpi
+
+        def export(task):
+            return export_sheets(filepath, sheet_names, settings, output_dir, image_format, dpi,
+                                 extra_columns_by_sheet=derived_columns, task=task)
+
+        self.run_background_task(export, f"{len(sheet_names)} シートを書き出し中...",
+                                 on_success=lambda results: self.on_export_all_sheets_finished(output_dir, results),
+                                 on_error=lambda e: messagebox.showerror("エラー", f"グラフの書き出しに失敗しました:\n{e}", parent=self.master))
+
+    def on_export_all_sheets_finished(self, output_dir, results):
+        """Report how many sheets were written and list the ones that failed."""
+        failures = [(sheet_name, error) for _, sheet_name, _, error in results if error]
+        message = f"{len(results) - len(failures)} / {len(results)} シートのグラフを {output_dir} に書き出しました。"
+        if failures:
+            message += "\n\n書き出せなかったシート:\n" + "\n".join(f"{sheet_name}: {error}" for sheet_name, error in failures)
+            messagebox.showwarning("書き出し完了", message, parent=self.master)
+        else:
+            messagebox.showinfo("書き出し完了", message, parent=self.master)
+
     def show_data_table_window(self):
         """Open the data output window showing slice and marker tables."""
         if self.data_output_window is None or not self.data_output_window.winfo_exists():
@@ -1860,8 +2552,11 @@ class BioGraphApp:
                 count += 1
                 new_col_name = f"{y_col_original}{suffix}{count}"
 
-            self.df[new_col_name] = pd.Series(result_data, index=common_index)
-            self.df[new_col_name] = self.df[new_col_name].reindex(self.df.index)
+            new_series = pd.Series(result_data, index=common_index).reindex(self.df.index)
+            self.df[new_col_name] = new_series
+            self.df_generation += 1
+            if self.current_sheet_name is not None:
+                self.derived_columns.setdefault(self.current_sheet_name, {})[new_col_name] = new_series
 
 
             self.update_column_lists_ui(new_col_name, y_col_original, op_name)
@@ -1907,6 +2602,7 @@ class BioGraphApp:
             self.update_legend_entries_ui()
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
     root = tk.Tk()
     app = BioGraphApp(root)
     root.mainloop()
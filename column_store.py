@@ -0,0 +1,97 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+VALUES_FILE = "values.npy"
+COLUMNS_FILE = "columns.json"
+OTHER_FILE = "other.pkl"
+
+
+def is_memmap_column(series):
+    """Return True if the column is stored in the memory-mapped array."""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def write_memmap_frame(df, directory):
+    """Convert a sheet into an on-disk column store.
+
+    Numeric columns are written as float64 into a single column-major ``.npy``
+    file so each column is one contiguous region of the file. Other columns are
+    usually small (labels, event names) and are pickled alongside.
+    """
+    os.makedirs(directory, exist_ok=True)
+    columns = [str(col) if not isinstance(col, str) else col for col in df.columns]
+    numeric_mask = [is_memmap_column(df.iloc[:, i]) for i in range(df.shape[1])]
+    numeric_positions = [i for i, is_numeric in enumerate(numeric_mask) if is_numeric]
+
+    values = np.lib.format.open_memmap(os.path.join(directory, VALUES_FILE), mode="w+", dtype=np.float64,
+                                       shape=(len(df), len(numeric_positions)), fortran_order=True)
+    for target, position in enumerate(numeric_positions):
+        values[:, target] = df.iloc[:, position].to_numpy(dtype=np.float64, na_value=np.nan)
+    values.flush()
+    del values
+
+    other = df.iloc[:, [i for i, is_numeric in enumerate(numeric_mask) if not is_numeric]]
+    other.columns = [columns[i] for i, is_numeric in enumerate(numeric_mask) if not is_numeric]
+    other.reset_index(drop=True).to_pickle(os.path.join(directory, OTHER_FILE))
+
+    # The column list is written last and marks the store as complete.
+    with open(os.path.join(directory, COLUMNS_FILE), "w", encoding="utf-8") as f:
+        json.dump({"columns": columns, "numeric": numeric_mask}, f, ensure_ascii=False)
+
+
+def has_memmap_frame(directory):
+    """Return True if a complete column store exists in ``directory``."""
+    return os.path.exists(os.path.join(directory, COLUMNS_FILE))
+
+
+def open_memmap_values(directory):
+    """Return the read-only memory map of the numeric columns of a column store."""
+    return np.load(os.path.join(directory, VALUES_FILE), mmap_mode="r")
+
+
+def open_memmap_frame(directory, values=None):
+    """Return a DataFrame whose numeric columns are views of the memory map.
+
+    Nothing is read until a column is accessed, and slicing with ``iloc``
+    only pages in the requested rows. The map is opened read-only; pass
+    ``values`` from :func:`open_memmap_values` to use a map opened already.
+    """
+    with open(os.path.join(directory, COLUMNS_FILE), encoding="utf-8") as f:
+        layout = json.load(f)
+    if values is None:
+        values = open_memmap_values(directory)
+    numeric_columns = [col for col, is_numeric in zip(layout["columns"], layout["numeric"]) if is_numeric]
+    df = pd.DataFrame(values, columns=numeric_columns, copy=False)
+
+    other = pd.read_pickle(os.path.join(directory, OTHER_FILE))
+    # Columns are matched by position, since sheets may repeat column names.
+    other_position = 0
+    for position, (col, is_numeric) in enumerate(zip(layout["columns"], layout["numeric"])):
+        if not is_numeric:
+            # insert() adds a separate block, so the memory-mapped block is never consolidated into RAM.
+            df.insert(position, col, other.iloc[:, other_position].to_numpy(), allow_duplicates=True)
+            other_position += 1
+    return df
+
+
+def is_memory_mapped(values):
+    """Return True if the array is (a view of) a memory map."""
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = getattr(values, "base", None)
+    return False
+
+
+def resident_size(df):
+    """Return the bytes of a memory-mapped frame that are held in RAM.
+
+    Only the non-numeric columns of a frame returned by
+    :func:`open_memmap_frame` live in memory.
+    """
+    other_positions = [i for i in range(df.shape[1]) if not is_memmap_column(df.iloc[:, i])]
+    return int(df.iloc[:, other_positions].memory_usage(index=False, deep=True).sum())
@@ -0,0 +1,109 @@
+"""Reduce long series to roughly the number of points a plot can show.
+
+Both reducers keep real samples (no averaging), so peaks, troughs and the
+values shown in tooltips are those of the recorded data. They expect the X
+values to be sorted in ascending order; :func:`decimate_for_view` returns the
+data unchanged otherwise.
+"""
+import numpy as np
+
+
+POINTS_PER_PIXEL = 2
+MIN_POINTS_TO_DECIMATE = 5000
+DECIMATION_METHODS = ("minmax", "lttb")
+
+
+def is_sorted(x):
+    """Return True if ``x`` is ascending and contains no NaN."""
+    x = np.asarray(x)
+    if len(x) < 2:
+        return True
+    if x.dtype.kind == "f" and np.isnan(x).any():
+        return False
+    return bool(np.all(x[1:] >= x[:-1]))
+
+
+def visible_slice(x, x_min, x_max):
+    """Return the index slice of sorted ``x`` inside [x_min, x_max] plus one point either side.
+
+    The extra points keep the line running to the edges of the axes.
+    """
+    start = max(int(np.searchsorted(x, x_min, side="left")) - 1, 0)
+    stop = min(int(np.searchsorted(x, x_max, side="right")) + 1, len(x))
+    return slice(start, stop)
+
+
+def minmax_indices(y, n_buckets):
+    """Return the sorted indices of the minimum and maximum of each of ``n_buckets`` buckets.
+
+    The first and last samples are always included. NaN values are ignored
+    unless a whole bucket is NaN, in which case its first sample is kept so
+    the gap stays visible.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    missing = np.isnan(blocks)
+    base = np.arange(n_buckets) * size
+    lows = np.where(missing, np.inf, blocks).argmin(axis=1) + base
+    highs = np.where(missing, -np.inf, blocks).argmax(axis=1) + base
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
+
+
+def lttb_indices(x, y, n_out):
+    """Return the indices chosen by Largest-Triangle-Three-Buckets for ``n_out`` points.
+
+    LTTB keeps the shape of the curve with fewer points than min/max but is
+    slower, so it is better suited to exports than to interactive redraws.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = np.nanmean(x[stop:next_stop]) if next_stop > stop else x[-1]
+        next_y = np.nanmean(y[stop:next_stop]) if next_stop > stop else y[-1]
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        area = np.where(np.isnan(area), -1.0, area)
+        previous = start + int(area.argmax())
+        indices[bucket + 1] = previous
+    return np.unique(indices)
+
+
+def decimate_for_view(x, y, x_range=None, pixels=1000, method="minmax"):
+    """Return the (x, y) arrays to draw for the visible X range at ``pixels`` width.
+
+    ``x_range`` is the (left, right) limit of the axes, or None for all data.
+    Series shorter than :data:`MIN_POINTS_TO_DECIMATE` or with unsorted X are
+    returned as they are (cropped to the visible range when possible).
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if not is_sorted(x):
+        return x, y
+    if x_range is not None:
+        rows = visible_slice(x, min(x_range), max(x_range))
+        x, y = x[rows], y[rows]
+    n_points = max(int(pixels * POINTS_PER_PIXEL), 2)
+    if len(x) < max(MIN_POINTS_TO_DECIMATE, n_points):
+        return x, y
+    if method == "lttb":
+        indices = lttb_indices(x, y, n_points)
+    else:
+        indices = minmax_indices(y, n_points // 2)
+    return x[indices], y[indices]
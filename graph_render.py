@@ -0,0 +1,181 @@
+import platform
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from decimation import decimate_for_view
+from statistics_engine import compute_column_statistics
+
+
+ASPECT_RATIOS = {"デフォルト (6:4)": (6, 4), "4:3": (4, 3), "16:9": (16, 9), "1:1 (正方形)": (1, 1), "3:4 (縦長)": (3, 4)}
+LEGEND_LOCATIONS = {"自動": "best", "右上": "upper right", "左上": "upper left", "右下": "lower right", "左下": "lower left", "右": "right", "中央左": "center left", "中央右": "center right", "下中央": "lower center", "上中央": "upper center", "中央": "center"}
+GRID_LINESTYLE_CHOICES = {"実線": "-", "破線": "--", "点線": ":", "一点鎖線": "-."}
+DEFAULT_FIGURE_WIDTH_INCHES = 6
+
+STATISTICS = {
+    "最大値": "max", "最小値": "min", "平均値": "mean",
+    "標準偏差": "std", "中央値": "median",
+    "最大値時のX座標": "idxmax_x", "最小値時のX座標": "idxmin_x"
+}
+
+
+def configure_japanese_font():
+    """Select the first available Japanese-capable font for Matplotlib."""
+    try:
+        if platform.system() == 'Windows':
+            font_candidates = ['Meiryo', 'MS Gothic', 'Yu Gothic', 'TakaoPGothic', 'IPAexGothic', 'sans-serif']
+        elif platform.system() == 'Darwin':
+            font_candidates = ['Hiragino Sans', 'IPAexGothic', 'TakaoPGothic', 'AppleGothic', 'sans-serif']
+        else:
+            font_candidates = ['IPAexGothic', 'TakaoPGothic', 'VL Gothic', 'Noto Sans CJK JP', 'DejaVu Sans', 'sans-serif']
+        found_font = False
+        for font_name in font_candidates:
+            try:
+                matplotlib.font_manager.fontManager.findfont(font_name, fallback_to_default=False)
+                matplotlib.rcParams['font.family'] = font_name
+                found_font = True; break
+            except Exception:
+                # Ignore fonts that are unavailable on the current system
+                continue
+        if not found_font: matplotlib.rcParams['font.family'] = 'sans-serif'
+        matplotlib.rcParams['axes.unicode_minus'] = False
+    except Exception as e:
+        print(f"Error setting Matplotlib font properties globally: {e}")
+
+
+def figure_size(aspect_ratio_name):
+    """Return a (width, height) tuple in inches for an aspect ratio name."""
+    ratio_w, ratio_h = ASPECT_RATIOS.get(aspect_ratio_name, ASPECT_RATIOS[list(ASPECT_RATIOS.keys())[0]])
+    fig_width = DEFAULT_FIGURE_WIDTH_INCHES
+    return (fig_width, fig_width * (ratio_h / ratio_w))
+
+
+def grid_linestyle(value):
+    """Return the Matplotlib line style for a grid style display name or style string."""
+    if value in GRID_LINESTYLE_CHOICES:
+        return GRID_LINESTYLE_CHOICES[value]
+    return value if value in GRID_LINESTYLE_CHOICES.values() else '-'
+
+
+def row_slice_from_strings(n_rows, start_row_str="", end_row_str=""):
+    """Return the row slice for 1-based start/end row strings, or the full range if invalid."""
+    try:
+        start_idx = max(int(start_row_str) - 1, 0) if start_row_str else None
+        end_idx = min(int(end_row_str), n_rows) if end_row_str else None
+    except ValueError:
+        return slice(None)
+    if start_idx is not None and start_idx >= (end_idx if end_idx is not None else n_rows):
+        return slice(None)
+    if end_idx is not None and end_idx <= 0:
+        return slice(None)
+    return slice(start_idx, end_idx)
+
+
+def _parse_float(value):
+    value = str(value).strip() if value is not None else ""
+    return float(value) if value else None
+
+
+def render_figure(df, settings, figure=None, dpi=None):
+    """Draw a line graph of ``df`` according to a settings dictionary.
+
+    ``settings`` uses the keys written by ``BioGraphApp.collect_current_settings``
+    (the preset format). ``vline_markers`` entries may additionally carry an
+    ``x`` coordinate, ``detect_maxima``/``detect_minima`` enable the
+    extremum markers, ``rasterize_lines`` draws the data lines as images and
+    ``decimate_lines`` decimates them for the width of the axes at ``dpi``
+    (the resolution the figure will be saved at, default the figure's own).
+    The figure is created without pyplot, so this works in worker processes
+    on the Agg backend. Raises ``KeyError`` if the X or a Y column is missing
+    and ``ValueError`` if the X column is not numeric.
+    """
+    x_col = settings.get('x_axis_column')
+    y_cols = [col for col in settings.get('y_axis_columns', []) if col in df.columns]
+    if not x_col or x_col not in df.columns:
+        raise KeyError(x_col)
+    if not y_cols:
+        raise KeyError(", ".join(settings.get('y_axis_columns', [])) or "Y")
+    if not pd.api.types.is_numeric_dtype(df[x_col]):
+        raise ValueError(f"X軸の列 '{x_col}' は数値データではありません。")
+
+    base_fontsize = int(settings.get('global_fontsize', 10))
+    legend_labels = settings.get('legend_labels', {})
+    if figure is None:
+        figure = Figure(figsize=figure_size(settings.get('aspect_ratio')), dpi=100)
+    figure.patch.set_facecolor(settings.get('figure_bg_color', '#F0F0F0'))
+    ax = figure.add_subplot(111)
+    ax.set_facecolor(settings.get('plot_bg_color', 'white'))
+
+    x_data = df[x_col]
+    rasterize_lines = bool(settings.get('rasterize_lines', False))
+    numeric_y_cols = [col for col in y_cols if pd.api.types.is_numeric_dtype(df[col])]
+    for y_col in numeric_y_cols:
+        ax.plot(x_data, df[y_col], label=legend_labels.get(y_col, y_col), rasterized=rasterize_lines)
+
+    for flag, method, color in (('detect_maxima', 'idxmax', 'red'), ('detect_minima', 'idxmin', 'blue')):
+        if not settings.get(flag):
+            continue
+        for y_col in numeric_y_cols:
+            y_series = df[y_col].dropna()
+            if y_series.empty: continue
+            idx = getattr(y_series, method)()
+            ax.scatter(df.loc[idx, x_col], y_series.loc[idx], color=color, marker='o', s=50, zorder=5)
+
+    for marker in settings.get('vline_markers', []):
+        x_coord = _parse_float(marker.get('x'))
+        if x_coord is None: continue
+        color = marker.get('color', 'black'); name = marker.get('name', "")
+        ax.axvline(x=x_coord, color=color, linewidth=marker.get('linewidth', 1.5), linestyle='--')
+        if name:
+            y_min, y_max = ax.get_ylim(); x_min, x_max = ax.get_xlim()
+            ax.text(x_coord + (x_max - x_min) * 0.01, y_min + (y_max - y_min) * 0.9, name, color=color, fontsize=base_fontsize - 1, ha='left', va='center')
+
+    x_min, x_max = _parse_float(settings.get('x_min')), _parse_float(settings.get('x_max'))
+    y_min, y_max = _parse_float(settings.get('y_min')), _parse_float(settings.get('y_max'))
+    if x_min is not None or x_max is not None: ax.set_xlim(left=x_min, right=x_max)
+    if y_min is not None or y_max is not None: ax.set_ylim(bottom=y_min, top=y_max)
+
+    title = settings.get('graph_title') or f"{', '.join(y_cols)} vs {x_col}"
+    ax.set_title(title, fontsize=base_fontsize + 2)
+    ax.set_xlabel(settings.get('x_axis_label') or x_col, fontsize=base_fontsize)
+    ax.set_ylabel(settings.get('y_axis_label', "値"), fontsize=base_fontsize)
+    ax.tick_params(axis='x', labelsize=base_fontsize - 1)
+    ax.tick_params(axis='y', labelsize=base_fontsize - 1)
+    if ax.get_lines():
+        ax.legend(loc=LEGEND_LOCATIONS.get(settings.get('legend_location'), 'best'), fontsize=base_fontsize - 1)
+    if settings.get('grid_visible', True):
+        ax.grid(True, color=settings.get('grid_color', 'lightgray'), linestyle=grid_linestyle(settings.get('grid_linestyle', '-')),
+                linewidth=settings.get('grid_linewidth', 0.8))
+    else:
+        ax.grid(False)
+    figure.tight_layout()
+    if settings.get('decimate_lines'):
+        pixels = ax.get_window_extent().width * (dpi or figure.dpi) / figure.dpi
+        x_range = tuple(ax.get_xlim())
+        for line in ax.get_lines():
+            x_values, y_values = line.get_xdata(orig=True), line.get_ydata(orig=True)
+            if len(x_values) > 2:
+                line.set_data(*decimate_for_view(np.asarray(x_values, dtype=np.float64), np.asarray(y_values, dtype=np.float64), x_range, pixels))
+    return figure
+
+
+def compute_statistics(df, x_col, y_cols, legend_labels=None, results=None):
+    """Return a DataFrame with the statistics table for the given Y columns.
+
+    ``results`` may be passed in from a :class:`statistics_engine.StatisticsCache`;
+    otherwise they are computed with :func:`statistics_engine.compute_column_statistics`.
+    Columns without statistics get an empty row.
+    """
+    legend_labels = legend_labels or {}
+    if results is None:
+        results = compute_column_statistics(df, x_col, y_cols)
+    rows = []
+    for y_col in y_cols:
+        row = {"Y軸データ系列": legend_labels.get(y_col, y_col)}
+        values = results.get(y_col)
+        if isinstance(values, dict):
+            row.update({display_name: values[key] for display_name, key in STATISTICS.items() if values[key] is not None})
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["Y軸データ系列"] + list(STATISTICS.keys()))
@@ -1,7 +1,242 @@
+import os
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from tkinter import ttk, filedialog, messagebox, simpledialog
 import pandas as pd
 
+import readers
+from background_task import BackgroundTask, TaskCancelled
+
+
+class IntegrationProgressWindow(tk.Toplevel):
+    """Small window showing the progress of a background integration step."""
+
+    def __init__(self, master, on_cancel):
+        """Create the progress bar, status label and cancel button."""
+        super().__init__(master)
+        self.title("Integrating files")
+        self.resizable(False, False)
+        self.status_var = tk.StringVar(value="Starting...")
+        ttk.Label(self, textvariable=self.status_var, width=60).pack(padx=10, pady=(10, 5))
+        self.progressbar = ttk.Progressbar(self, orient=tk.HORIZONTAL, length=360, mode="determinate", maximum=100)
+        self.progressbar.pack(padx=10, pady=5)
+        self.cancel_button = ttk.Button(self, text="Cancel", command=on_cancel)
+        self.cancel_button.pack(pady=(5, 10))
+        self.protocol("WM_DELETE_WINDOW", on_cancel)
+
+    def update_progress(self, fraction=None, message=None):
+        """Show a worker progress report."""
+        if message:
+            self.status_var.set(message)
+        if fraction is not None:
+            self.progressbar.config(value=fraction * 100)
+
+
+DEFAULT_CHUNK_SIZE = 50000
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def read_input_file(path):
+    """Read one CSV or Excel file into a DataFrame."""
+    if path.lower().endswith((".xlsx", ".xls")):
+        return readers.read_table(path)
+    return readers.read_csv(path)
+
+
+def read_input_columns(path):
+    """Return the column names of a CSV or Excel file without reading its rows."""
+    if path.lower().endswith((".xlsx", ".xls")):
+        return readers.read_columns(path)
+    return readers.read_csv(path, nrows=0).columns.tolist()
+
+
+def iter_input_chunks(path, chunksize=DEFAULT_CHUNK_SIZE):
+    """Yield a CSV or Excel file as DataFrames of at most ``chunksize`` rows.
+
+    Reading goes through :func:`readers.read_chunks`, so the engine registry
+    picks the engine and falls back on failure. Files that are not Excel
+    workbooks are read as CSV, as :func:`read_input_file` does.
+    """
+    file_format_name = None if path.lower().endswith((".xlsx", ".xls")) else "csv"
+    yield from readers.read_chunks(path, chunksize, file_format_name=file_format_name)
+
+
+def align_to_columns(df, columns, partial_columns):
+    """Reindex ``df`` to the output columns, writing columns some files lack as floats.
+
+    ``pd.concat`` upcasts such columns to float for every file because the
+    missing rows become NaN; converting them here keeps "1" and "1.0" from
+    being mixed in one output column.
+    """
+    df = df.reindex(columns=columns)
+    for col in partial_columns:
+        if pd.api.types.is_integer_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col]):
+            df[col] = df[col].astype("float64")
+    return df
+
+
+def partial_column_names(columns_per_file, columns):
+    """Return the columns of ``columns`` that are missing from at least one file."""
+    return [col for col in columns if any(col not in file_columns for file_columns in columns_per_file)]
+
+
+def stream_integrate(file_paths, save_path, chunksize=DEFAULT_CHUNK_SIZE, task=None):
+    """Concatenate files into ``save_path`` while holding roughly one chunk in memory.
+
+    The column union is collected from the file headers first, so the header
+    is written once and every chunk is aligned to it before being appended.
+    The rows, columns and column order match ``pd.concat(frames,
+    ignore_index=True)``, and columns missing from some files are written as
+    floats everywhere, as ``pd.concat`` does. Otherwise each chunk is written
+    with its own types: an integer column with blanks in only some chunks is
+    written as "1" in the others and "1.0" in those, and Excel cells are
+    typed chunk by chunk, so mixed columns may be written differently than
+    by ``pd.concat``.
+
+    Like :func:`parallel_integrate`, files that cannot be read are skipped
+    (rows already written from a file that fails part-way are removed again)
+    and ``(save_path, [(path, error message), ...])`` is returned;
+    RuntimeError is raised only when none of the files can be read.
+    If ``task`` (a :class:`BackgroundTask`) is given, progress is reported and
+    cancellation is honoured between chunks. A partial output file is removed
+    when the task is cancelled.
+    """
+    failures = []
+    columns = []
+    columns_per_file = []
+    readable_paths = []
+    for path in file_paths:
+        if task: task.check_cancelled()
+        file_columns, error = _read_columns_or_error(path)
+        if error:
+            failures.append((path, error))
+            continue
+        readable_paths.append(path)
+        columns_per_file.append(set(file_columns))
+        columns.extend(col for col in file_columns if col not in columns)
+    if not readable_paths:
+        raise RuntimeError("None of the selected files could be read:\n" +
+                           "\n".join(f"{path}: {error}" for path, error in failures))
+    partial_columns = partial_column_names(columns_per_file, columns)
+
+    header_written = False
+    output_created = False
+    written_files = 0
+    try:
+        for i, path in enumerate(readable_paths):
+            if task: task.report_progress(i / len(readable_paths), f"Reading {path}")
+            file_start = os.path.getsize(save_path) if header_written else 0
+            header_written_before = header_written
+            try:
+                for chunk in iter_input_chunks(path, chunksize):
+                    if task: task.check_cancelled()
+                    align_to_columns(chunk, columns, partial_columns).to_csv(save_path, mode="a" if header_written else "w",
+                                                                             header=not header_written, index=False)
+                    header_written = output_created = True
+            except TaskCancelled:
+                raise
+            except Exception as e:
+                failures.append((path, f"{type(e).__name__}: {e}"))
+                if header_written:
+                    with open(save_path, "r+b") as f:
+                        f.truncate(file_start)
+                    header_written = header_written_before
+                continue
+            written_files += 1
+        if not written_files:
+            raise RuntimeError("None of the selected files could be read:\n" +
+                               "\n".join(f"{path}: {error}" for path, error in failures))
+        if not header_written:
+            pd.DataFrame(columns=columns).to_csv(save_path, index=False)
+    except BaseException:
+        if output_created and os.path.exists(save_path):
+            os.remove(save_path)
+        raise
+    if task: task.report_progress(1.0, "Done")
+    return save_path, failures
+
+
+def _read_columns_or_error(path):
+    """Process-pool helper returning (columns, None) or (None, error message)."""
+    try:
+        return read_input_columns(path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _read_file_or_error(path):
+    """Process-pool helper returning (DataFrame, None) or (None, error message)."""
+    try:
+        return read_input_file(path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def parallel_integrate(file_paths, save_path, max_workers=DEFAULT_WORKERS, task=None):
+    """Read files in a process pool and append them to ``save_path`` in input order.
+
+    Files that cannot be read are skipped instead of aborting the batch; they
+    are returned as a list of ``(path, error message)`` together with the save
+    path. At most ``max_workers + 1`` files are held in memory at once because
+    results are written as soon as the next file in order is available.
+    """
+    failures = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            columns = []
+            columns_per_file = []
+            readable_paths = []
+            for path, (file_columns, error) in zip(file_paths, executor.map(_read_columns_or_error, file_paths)):
+                if task: task.check_cancelled()
+                if error:
+                    failures.append((path, error))
+                    continue
+                readable_paths.append(path)
+                columns_per_file.append(set(file_columns))
+                columns.extend(col for col in file_columns if col not in columns)
+            if not readable_paths:
+                raise RuntimeError("None of the selected files could be read:\n" +
+                                   "\n".join(f"{path}: {error}" for path, error in failures))
+            partial_columns = partial_column_names(columns_per_file, columns)
+
+            pending = deque()
+            remaining = iter(readable_paths)
+            for path in remaining:
+                pending.append((path, executor.submit(_read_file_or_error, path)))
+                if len(pending) > max_workers:
+                    break
+
+            header_written = False
+            done_count = 0
+            try:
+                while pending:
+                    path, future = pending.popleft()
+                    df, error = future.result()
+                    next_path = next(remaining, None)
+                    if next_path is not None:
+                        pending.append((next_path, executor.submit(_read_file_or_error, next_path)))
+                    done_count += 1
+                    if task:
+                        task.check_cancelled()
+                        task.report_progress(done_count / len(readable_paths), f"Read {path}")
+                    if error:
+                        failures.append((path, error))
+                        continue
+                    align_to_columns(df, columns, partial_columns).to_csv(save_path, mode="a" if header_written else "w",
+                                                                          header=not header_written, index=False)
+                    header_written = True
+                if not header_written:
+                    pd.DataFrame(columns=columns).to_csv(save_path, index=False)
+            except BaseException:
+                if header_written and os.path.exists(save_path):
+                    os.remove(save_path)
+                raise
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return save_path, failures
+
 
 def integrate_files():
     """Combine multiple CSV/Excel files into one CSV file."""
@@ -20,26 +255,6 @@ def integrate_files():
         root.destroy()
         return
 
-    frames = []
-    for path in file_paths:
-        try:
-            if path.lower().endswith((".xlsx", ".xls")):
-                df = pd.read_excel(path)
-            else:
-                df = pd.read_csv(path)
-            frames.append(df)
-        except Exception as e:
-            messagebox.showerror("Read error", f"Failed to read {path}:\n{e}")
-            root.destroy()
-            return
-
-    try:
-        combined = pd.concat(frames, ignore_index=True)
-    except Exception as e:
-        messagebox.showerror("Combine error", f"Failed to combine files:\n{e}")
-        root.destroy()
-        return
-
     save_path = filedialog.asksaveasfilename(
         title="Save merged CSV",
         defaultextension=".csv",
@@ -50,13 +265,56 @@ def integrate_files():
         root.destroy()
         return
 
-    try:
-        combined.to_csv(save_path, index=False)
-        messagebox.showinfo("Success", f"Integrated file saved to:\n{save_path}")
-    except Exception as e:
-        messagebox.showerror("Save error", f"Failed to save file:\n{e}")
-    finally:
+    max_workers = simpledialog.askinteger(
+        "Parallel reading",
+        "Number of worker processes for reading files\n(1 = stream one file at a time with minimal memory):",
+        initialvalue=DEFAULT_WORKERS, minvalue=1, maxvalue=os.cpu_count() or 1,
+    )
+    if max_workers is None:
+        messagebox.showinfo("Integration cancelled", "Integration was cancelled.")
         root.destroy()
+        return
+
+    if max_workers == 1:
+        def run(task):
+            return stream_integrate(file_paths, save_path, task=task)
+    else:
+        def run(task):
+            return parallel_integrate(file_paths, save_path, max_workers=max_workers, task=task)
+
+    state = {"task": None}
+    progress_window = IntegrationProgressWindow(root, on_cancel=lambda: state["task"] and state["task"].cancel())
+
+    def finish():
+        progress_window.destroy()
+        root.destroy()
+
+    def on_cancel():
+        messagebox.showinfo("Integration cancelled", "Integration was cancelled.", parent=progress_window)
+        finish()
+
+    def on_saved(result):
+        path, failures = result
+        if failures:
+            details = "\n".join(f"{failed_path}: {error}" for failed_path, error in failures)
+            messagebox.showwarning("Integrated with errors",
+                                   f"Integrated file saved to:\n{path}\n\n{len(failures)} file(s) could not be read and were skipped:\n{details}",
+                                   parent=progress_window)
+        else:
+            messagebox.showinfo("Success", f"Integrated file saved to:\n{path}", parent=progress_window)
+        finish()
+
+    def on_error(error):
+        if isinstance(error, RuntimeError):
+            messagebox.showerror("Read error", str(error), parent=progress_window)
+        else:
+            messagebox.showerror("Save error", f"Failed to save file:\n{error}", parent=progress_window)
+        finish()
+
+    state["task"] = BackgroundTask(root, run,
+                                   on_success=on_saved, on_error=on_error,
+                                   on_progress=progress_window.update_progress, on_cancel=on_cancel).start()
+    root.mainloop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+"""Look up the Y values at event marker X coordinates with binary search."""
+import numpy as np
+
+from decimation import is_sorted
+
+
+class XLookup:
+    """Locates X coordinates in one X column for many markers at once.
+
+    NaN X values are skipped. Ascending X (the usual time axis) is searched
+    directly with ``searchsorted``; any other X column is sorted once (stably,
+    so equal X values keep their row order) and searched the same way.
+    """
+
+    def __init__(self, x):
+        """Prepare the non-NaN values of ``x`` for searching."""
+        x = np.asarray(x, dtype=np.float64)
+        self.rows = np.flatnonzero(~np.isnan(x))
+        self.values = x[self.rows]
+        if not is_sorted(self.values):
+            order = np.argsort(self.values, kind="stable")
+            self.rows = self.rows[order]
+            self.values = self.values[order]
+
+    def nearest_rows(self, targets):
+        """Return the row of the X value closest to each target, or -1.
+
+        Ties go to the earliest row, as with ``(x - target).abs().idxmin()``.
+        -1 is returned for NaN targets and when X has no values.
+        """
+        targets = np.asarray(targets, dtype=np.float64)
+        result = np.full(len(targets), -1, dtype=np.int64)
+        if not len(self.values):
+            return result
+        last = len(self.values) - 1
+        upper = np.searchsorted(self.values, targets, side="left").clip(max=last)
+        # First position of the run of equal values just below the target.
+        lower = np.searchsorted(self.values, self.values[(upper - 1).clip(min=0)], side="left")
+        upper_distance = np.abs(self.values[upper] - targets)
+        lower_distance = np.abs(targets - self.values[lower])
+        upper_rows, lower_rows = self.rows[upper], self.rows[lower]
+        closest = np.where(lower_distance < upper_distance, lower_rows,
+                           np.where(upper_distance < lower_distance, upper_rows, np.minimum(lower_rows, upper_rows)))
+        valid = ~np.isnan(targets)
+        result[valid] = closest[valid]
+        return result
+
+    def brackets(self, targets):
+        """Return ``(lower rows, upper rows, fraction)`` for linear interpolation at each target.
+
+        Targets outside the X range use the first or last sample (fraction 0),
+        like ``np.interp``. Rows are -1 for NaN targets and when X has no values.
+        """
+        targets = np.asarray(targets, dtype=np.float64)
+        lower_rows = np.full(len(targets), -1, dtype=np.int64)
+        upper_rows = lower_rows.copy()
+        fraction = np.zeros(len(targets))
+        if not len(self.values):
+            return lower_rows, upper_rows, fraction
+        last = len(self.values) - 1
+        upper = np.searchsorted(self.values, targets, side="right").clip(1, max(last, 1))
+        lower = upper - 1
+        if last == 0:
+            upper = lower = np.zeros(len(targets), dtype=np.int64)
+        span = self.values[upper] - self.values[lower]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.where(span > 0, (targets - self.values[lower]) / span, 0.0)
+        fraction = fraction.clip(0.0, 1.0)
+        valid = ~np.isnan(targets)
+        lower_rows[valid] = self.rows[lower][valid]
+        upper_rows[valid] = self.rows[upper][valid]
+        fraction[~valid] = 0.0
+        return lower_rows, upper_rows, fraction
+
+
+def marker_values(x, y_columns, targets, interpolate=False):
+    """Return an array of shape ``(len(targets), len(y_columns))`` with the Y values at each target.
+
+    Without ``interpolate`` the value of the sample nearest to each target is
+    used; with it the two samples around the target are interpolated
+    linearly. Cells are NaN where X has no values or the sample is NaN.
+    """
+    lookup = x if isinstance(x, XLookup) else XLookup(x)
+    result = np.full((len(targets), len(y_columns)), np.nan)
+    if interpolate:
+        lower_rows, upper_rows, fraction = lookup.brackets(targets)
+        found = lower_rows >= 0
+        for i, y in enumerate(y_columns):
+            y = np.asarray(y)
+            lower_values = y[lower_rows[found]].astype(np.float64)
+            upper_values = y[upper_rows[found]].astype(np.float64)
+            # A zero weight keeps an exact hit valid even if the other neighbour is NaN.
+            weight = fraction[found]
+            result[found, i] = np.where(weight == 0, lower_values,
+                                        np.where(weight == 1, upper_values, lower_values + (upper_values - lower_values) * weight))
+    else:
+        rows = lookup.nearest_rows(targets)
+        found = rows >= 0
+        for i, y in enumerate(y_columns):
+            result[found, i] = np.asarray(y)[rows[found]].astype(np.float64)
+    return result
@@ -0,0 +1,63 @@
+"""Nearest-sample lookup for the data cursor."""
+import numpy as np
+from scipy.spatial import cKDTree
+
+from decimation import is_sorted
+
+
+class NearestPointIndex:
+    """Finds the sample of one series closest to a point in display coordinates.
+
+    For ascending X (the usual time axis) only the samples whose X lies within
+    ``radius`` pixels of the cursor are transformed, located with
+    ``searchsorted``. Other series are indexed with a KD-tree over their
+    display coordinates, rebuilt only when the view changes.
+    """
+
+    def __init__(self, x, y):
+        """Index the full-resolution arrays of a plotted series."""
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.sorted = is_sorted(self.x)
+        self._tree = None
+        self._tree_rows = None
+        self._tree_view = None
+
+    def nearest(self, transform, view_key, px, py, radius):
+        """Return ``(row, squared pixel distance)`` of the closest sample within ``radius``, or None.
+
+        ``transform`` maps data to display coordinates and ``view_key`` is any
+        hashable value that changes whenever that mapping does.
+        """
+        if self.sorted:
+            return self._nearest_in_window(transform, px, py, radius)
+        return self._nearest_in_tree(transform, view_key, px, py, radius)
+
+    def _nearest_in_window(self, transform, px, py, radius):
+        left, right = transform.inverted().transform([(px - radius, py), (px + radius, py)])[:, 0]
+        start = int(np.searchsorted(self.x, min(left, right), side="left"))
+        stop = int(np.searchsorted(self.x, max(left, right), side="right"))
+        if stop <= start:
+            return None
+        display = transform.transform(np.column_stack((self.x[start:stop], self.y[start:stop])))
+        dist_sq = (display[:, 0] - px) ** 2 + (display[:, 1] - py) ** 2
+        if np.isnan(dist_sq).all():
+            return None
+        offset = int(np.nanargmin(dist_sq))
+        if dist_sq[offset] >= radius ** 2:
+            return None
+        return start + offset, float(dist_sq[offset])
+
+    def _nearest_in_tree(self, transform, view_key, px, py, radius):
+        if self._tree is None or self._tree_view != view_key:
+            display = transform.transform(np.column_stack((self.x, self.y)))
+            finite = np.isfinite(display).all(axis=1)
+            self._tree_rows = np.flatnonzero(finite)
+            self._tree = cKDTree(display[finite]) if len(self._tree_rows) else None
+            self._tree_view = view_key
+        if self._tree is None:
+            return None
+        distance, position = self._tree.query((px, py), distance_upper_bound=radius)
+        if not np.isfinite(distance):
+            return None
+        return int(self._tree_rows[position]), float(distance ** 2)
@@ -0,0 +1,276 @@
+"""Registry of table readers that uses the fastest installed engine per file format.
+
+Each format has an ordered list of engines, fastest first. Engines whose
+Python package is not installed are skipped, and if an engine fails on a file
+the next one is tried. The time each successful read took is recorded so the
+engines can be compared (see :func:`engine_timings`). :func:`read_chunks`
+streams a file with the first engine of the same list that can read in
+chunks.
+"""
+import importlib.util
+import os
+import threading
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+
+_PANDAS_VERSION = tuple(int(part) for part in pd.__version__.split(".")[:2])
+
+# format -> [(engine name, required module or None)], fastest first
+_ENGINES = {
+    "xlsx": [("calamine", "python_calamine"), ("openpyxl", "openpyxl")],
+    "xls": [("calamine", "python_calamine"), ("xlrd", "xlrd")],
+    "csv": [("pyarrow", "pyarrow"), ("c", None), ("python", None)],
+    "parquet": [("pyarrow", "pyarrow"), ("fastparquet", "fastparquet")],
+}
+_EXTENSIONS = {
+    ".xlsx": "xlsx", ".xlsm": "xlsx", ".xls": "xls",
+    ".csv": "csv", ".tsv": "csv", ".tab": "csv", ".txt": "csv",
+    ".parquet": "parquet",
+}
+
+# engine -> function(filepath, chunksize, **kwargs) yielding DataFrames; filled below
+_CHUNK_READERS = {}
+
+_timings = defaultdict(list)
+_timings_lock = threading.Lock()
+
+
+def register_engine(file_format, engine, module=None, first=True, chunk_reader=None):
+    """Add an engine for a format; ``module`` is the package it needs.
+
+    ``chunk_reader(filepath, chunksize, **kwargs)`` lets :func:`read_chunks`
+    stream files with the engine.
+    """
+    if chunk_reader is not None:
+        _CHUNK_READERS[engine] = chunk_reader
+    engines = _ENGINES.setdefault(file_format, [])
+    engines[:] = [entry for entry in engines if entry[0] != engine]
+    if first:
+        engines.insert(0, (engine, module))
+    else:
+        engines.append((engine, module))
+
+
+def file_format(filepath):
+    """Return the registry format name for a file path."""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext not in _EXTENSIONS:
+        raise ValueError(f"未対応のファイル形式です: {ext or filepath}")
+    return _EXTENSIONS[ext]
+
+
+def _engine_available(engine, module):
+    if engine == "calamine" and _PANDAS_VERSION < (2, 2):
+        return False
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def available_engines(file_format_name):
+    """Return the installed engines for a format, fastest first."""
+    return [engine for engine, module in _ENGINES.get(file_format_name, []) if _engine_available(engine, module)]
+
+
+def record_timing(file_format_name, engine, seconds, filepath=None):
+    """Remember how long an engine took for one read."""
+    size_mb = os.path.getsize(filepath) / (1024 * 1024) if filepath and os.path.exists(filepath) else None
+    with _timings_lock:
+        _timings[(file_format_name, engine)].append((seconds, size_mb))
+
+
+def engine_timings():
+    """Return {(format, engine): (reads, total seconds, seconds per MB or None)}."""
+    with _timings_lock:
+        summary = {}
+        for key, samples in _timings.items():
+            total_seconds = sum(seconds for seconds, _ in samples)
+            sized = [(seconds, size) for seconds, size in samples if size]
+            per_mb = sum(seconds for seconds, _ in sized) / sum(size for _, size in sized) if sized else None
+            summary[key] = (len(samples), total_seconds, per_mb)
+        return summary
+
+
+def _with_fallback(file_format_name, filepath, read):
+    """Call ``read(engine)`` with each available engine until one succeeds."""
+    engines = available_engines(file_format_name)
+    if not engines:
+        raise ImportError(f"'{file_format_name}' 形式を読み込めるライブラリがインストールされていません。")
+    last_error = None
+    for engine in engines:
+        start = time.perf_counter()
+        try:
+            result = read(engine)
+        except (OSError, MemoryError):
+            raise
+        except Exception as e:
+            last_error = e
+            continue
+        record_timing(file_format_name, engine, time.perf_counter() - start, filepath)
+        return result
+    raise last_error
+
+
+def read_csv(filepath, **kwargs):
+    """Read a delimited text file with the fastest engine that supports ``kwargs``."""
+    return _with_fallback("csv", filepath, lambda engine: pd.read_csv(filepath, engine=engine, **kwargs))
+
+
+def read_parquet(filepath, **kwargs):
+    """Read a Parquet file with the fastest installed engine."""
+    return _with_fallback("parquet", filepath, lambda engine: pd.read_parquet(filepath, engine=engine, **kwargs))
+
+
+def read_table(filepath, **kwargs):
+    """Read a file of any registered format; Excel files return their first sheet."""
+    fmt = file_format(filepath)
+    if fmt == "csv":
+        kwargs.setdefault("sep", "," if filepath.lower().endswith(".csv") else "\t")
+        return read_csv(filepath, **kwargs)
+    if fmt == "parquet":
+        return read_parquet(filepath, **kwargs)
+    return _with_fallback(fmt, filepath, lambda engine: pd.read_excel(filepath, engine=engine, **kwargs))
+
+
+def read_columns(filepath):
+    """Return the column names of a file without reading its rows."""
+    if file_format(filepath) == "parquet":
+        return read_parquet(filepath).columns.tolist()
+    return read_table(filepath, nrows=0).columns.tolist()
+
+
+def _pandas_csv_chunks(engine):
+    def read(filepath, chunksize, **kwargs):
+        with pd.read_csv(filepath, engine=engine, chunksize=chunksize, **kwargs) as reader:
+            yield from reader
+    return read
+
+
+def _openpyxl_chunks(filepath, chunksize, **kwargs):
+    """Stream the first sheet of an .xlsx file using openpyxl's read-only mode."""
+    import openpyxl
+
+    columns = read_columns(filepath)
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = []
+        width = len(columns)
+        for row in workbook.worksheets[0].iter_rows(min_row=2, values_only=True):
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            if all(value is None for value in row):
+                continue
+            rows.append(row)
+            if len(rows) >= chunksize:
+                yield pd.DataFrame(rows, columns=columns).infer_objects()
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows, columns=columns).infer_objects()
+    finally:
+        workbook.close()
+
+
+_CHUNK_READERS.update({"c": _pandas_csv_chunks("c"), "python": _pandas_csv_chunks("python"), "openpyxl": _openpyxl_chunks})
+
+
+def read_chunks(filepath, chunksize, file_format_name=None, **kwargs):
+    """Yield a file as DataFrames of at most ``chunksize`` rows.
+
+    The installed engines of the format that can stream are tried in
+    registry order; an engine that fails before its first chunk falls back
+    to the next one (later errors are raised, since rows were already
+    yielded). Formats without a streaming engine are read whole with
+    :func:`read_table` and split. ``file_format_name`` overrides the format
+    implied by the extension.
+    """
+    fmt = file_format_name or file_format(filepath)
+    engines = [engine for engine in available_engines(fmt) if engine in _CHUNK_READERS]
+    last_error = None
+    for engine in engines:
+        start = time.perf_counter()
+        chunks = _CHUNK_READERS[engine](filepath, chunksize, **kwargs)
+        try:
+            first = next(chunks, None)
+        except (OSError, MemoryError):
+            raise
+        except Exception as e:
+            last_error = e
+            continue
+        seconds = time.perf_counter() - start
+        try:
+            while first is not None:
+                yield first
+                start = time.perf_counter()
+                first = next(chunks, None)
+                seconds += time.perf_counter() - start
+        finally:
+            chunks.close()
+        record_timing(fmt, engine, seconds, filepath)
+        return
+    if engines:
+        raise last_error
+    df = read_csv(filepath, **kwargs) if fmt == "csv" else read_table(filepath, **kwargs)
+    for start in range(0, max(len(df), 1), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+class ExcelWorkbook:
+    """Workbook handle that parses sheets with the fastest working engine.
+
+    The workbook is opened with the first available engine. If parsing a
+    sheet fails with that engine, the workbook is reopened with the next one
+    and the parse is retried.
+    """
+
+    def __init__(self, filepath):
+        """Open the workbook and read its sheet names."""
+        self.filepath = filepath
+        self.file_format = file_format(filepath)
+        self._engines = available_engines(self.file_format)
+        self._xls = None
+        self.engine = None
+        self._open(self._engines)
+
+    def _open(self, engines):
+        last_error = ImportError(f"'{self.file_format}' 形式を読み込めるライブラリがインストールされていません。")
+        for engine in engines:
+            try:
+                self._xls = pd.ExcelFile(self.filepath, engine=engine)
+                self.engine = engine
+                return
+            except (OSError, MemoryError):
+                raise
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    @property
+    def sheet_names(self):
+        return self._xls.sheet_names
+
+    def parse(self, sheet_name, **kwargs):
+        """Parse one sheet, falling back to slower engines on failure."""
+        while True:
+            start = time.perf_counter()
+            try:
+                df = self._xls.parse(sheet_name, **kwargs)
+            except (OSError, MemoryError, KeyError):
+                raise
+            except Exception:
+                remaining = self._engines[self._engines.index(self.engine) + 1:]
+                if not remaining:
+                    raise
+                self.close()
+                self._open(remaining)
+                continue
+            record_timing(self.file_format, self.engine, time.perf_counter() - start)
+            return df
+
+    def close(self):
+        """Close the underlying file handle."""
+        if self._xls is not None:
+            try:
+                self._xls.close()
+            except Exception:
+                pass
+            self._xls = None
@@ -0,0 +1,322 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+
+import pandas as pd
+
+import readers
+from column_store import has_memmap_frame, open_memmap_frame, open_memmap_values, write_memmap_frame
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.getcwd(), "biograph_sheet_cache")
+DEFAULT_CACHE_SIZE_MB = 1024
+
+PARQUET_AVAILABLE = bool(readers.available_engines("parquet"))
+
+
+class SheetCache:
+    """On-disk cache of parsed workbook sheets.
+
+    Entries are keyed by the absolute path, size and modification time of the
+    source file, so an edited workbook is parsed again automatically. Each
+    sheet is stored as a Parquet file when a Parquet engine is installed (falling back
+    to a pickle for sheets Parquet cannot represent), which loads far faster
+    than re-decoding the workbook XML. Sheets can also be converted into a
+    memory-mapped column store (see :mod:`column_store`) for recordings that
+    should not be loaded into RAM at all. When the cache grows beyond
+    ``max_size_mb`` the least recently used entries are removed.
+
+    Several processes (batch rendering, parallel integration) may share the
+    cache directory. Files and column stores are written under temporary
+    names and renamed into place, so a reader never sees a partial write,
+    and an entry is only valid while its ``meta.json`` lists it. Removing an
+    entry deletes ``meta.json`` first, and entries whose column stores are
+    still mapped by frames of this process are not removed.
+    """
+
+    META_FILE = "meta.json"
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+        """Use ``cache_dir`` for the cache, creating it on first write."""
+        self.cache_dir = cache_dir
+        self.max_size_mb = max_size_mb
+        self._lock = threading.Lock()
+        # Cache key -> weak references to the memory maps handed out for it.
+        self._open_maps = {}
+
+    def key_for(self, filepath):
+        """Return the cache key of the file in its current state."""
+        stat = os.stat(filepath)
+        ident = f"{os.path.abspath(filepath)}|{stat.st_size}|{stat.st_mtime_ns}"
+        return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), self.META_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, key, meta):
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        def write(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+        _write_atomically(os.path.join(entry_dir, self.META_FILE), write)
+
+    def _touch(self, key):
+        try:
+            os.utime(os.path.join(self._entry_dir(key), self.META_FILE))
+        except OSError:
+            pass
+
+    def get_sheet_names(self, filepath):
+        """Return the cached sheet names of the file, or None if unknown."""
+        try:
+            key = self.key_for(filepath)
+        except OSError:
+            return None
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        self._touch(key)
+        return meta.get("sheet_names")
+
+    def put_sheet_names(self, filepath, sheet_names):
+        """Record the sheet names of the file."""
+        key = self.key_for(filepath)
+        with self._lock:
+            meta = self._read_meta(key) or {"source": os.path.abspath(filepath), "sheets": {}}
+            meta["sheet_names"] = list(sheet_names)
+            self._write_meta(key, meta)
+
+    def get_sheet(self, filepath, sheet_name):
+        """Return the cached DataFrame for the sheet, or None on a cache miss."""
+        try:
+            key = self.key_for(filepath)
+        except OSError:
+            return None
+        meta = self._read_meta(key)
+        if not meta or sheet_name not in meta.get("sheets", {}):
+            return None
+        file_name = meta["sheets"][sheet_name]
+        path = os.path.join(self._entry_dir(key), file_name)
+        try:
+            if file_name.endswith(".parquet"):
+                df = readers.read_parquet(path)
+            else:
+                df = pd.read_pickle(path)
+        except Exception as e:
+            logger.warning("Ignoring unreadable cache file %s: %s", path, e)
+            return None
+        self._touch(key)
+        return df
+
+    def put_sheet(self, filepath, sheet_name, df):
+        """Store a parsed sheet and evict old entries if the cache is too large."""
+        key = self.key_for(filepath)
+        with self._lock:
+            meta = self._read_meta(key) or {"source": os.path.abspath(filepath), "sheets": {}}
+            entry_dir = self._entry_dir(key)
+            os.makedirs(entry_dir, exist_ok=True)
+            base_name = "sheet_" + hashlib.sha1(str(sheet_name).encode("utf-8")).hexdigest()[:12]
+            file_name = self._write_frame(df, os.path.join(entry_dir, base_name))
+            meta["sheets"][sheet_name] = file_name
+            self._write_meta(key, meta)
+            self._evict(keep=key)
+
+    def _memmap_name(self, sheet_name):
+        return "sheet_" + hashlib.sha1(str(sheet_name).encode("utf-8")).hexdigest()[:12] + ".mmap"
+
+    def _open_memmap(self, key, directory):
+        """Open a column store and remember that the entry is mapped."""
+        values = open_memmap_values(directory)
+        df = open_memmap_frame(directory, values)
+        with self._lock:
+            refs = [ref for ref in self._open_maps.get(key, []) if ref() is not None]
+            refs.append(weakref.ref(values))
+            self._open_maps[key] = refs
+        return df
+
+    def _in_use(self, key):
+        """Return True if frames of this process still map files of the entry."""
+        refs = [ref for ref in self._open_maps.get(key, []) if ref() is not None]
+        if refs:
+            self._open_maps[key] = refs
+        else:
+            self._open_maps.pop(key, None)
+        return bool(refs)
+
+    def get_memmap_sheet(self, filepath, sheet_name):
+        """Return a memory-mapped frame for the sheet, or None if it was never converted."""
+        try:
+            key = self.key_for(filepath)
+        except OSError:
+            return None
+        meta = self._read_meta(key)
+        name = meta.get("memmaps", {}).get(sheet_name) if meta else None
+        if name is None:
+            return None
+        directory = os.path.join(self._entry_dir(key), name)
+        if not has_memmap_frame(directory):
+            return None
+        try:
+            df = self._open_memmap(key, directory)
+        except Exception as e:
+            logger.warning("Ignoring unreadable memory-mapped sheet %s: %s", directory, e)
+            return None
+        self._touch(key)
+        return df
+
+    def put_memmap_sheet(self, filepath, sheet_name, df):
+        """Convert a parsed sheet into a memory-mapped store and return the mapped frame.
+
+        The store is written into a temporary directory and renamed into
+        place. If that is not possible (another process finished the same
+        sheet first, or a store there is still mapped) a complete existing
+        store is used, otherwise the temporary directory is kept as the store.
+        """
+        key = self.key_for(filepath)
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        name = self._memmap_name(sheet_name)
+        directory = os.path.join(entry_dir, name)
+        tmp_dir = tempfile.mkdtemp(prefix=name + ".", suffix=".tmp", dir=entry_dir)
+        try:
+            write_memmap_frame(df, tmp_dir)
+        except BaseException:
+            _remove_tree(tmp_dir)
+            raise
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            if has_memmap_frame(directory):
+                _remove_tree(tmp_dir)
+            else:
+                name = os.path.basename(tmp_dir)
+                directory = tmp_dir
+        with self._lock:
+            meta = self._read_meta(key) or {"source": os.path.abspath(filepath), "sheets": {}}
+            meta.setdefault("memmaps", {})[sheet_name] = name
+            self._write_meta(key, meta)
+        mapped = self._open_memmap(key, directory)
+        with self._lock:
+            self._evict(keep=key)
+        return mapped
+
+    def _write_frame(self, df, base_path):
+        """Write the frame as Parquet if possible, otherwise as a pickle."""
+        if PARQUET_AVAILABLE:
+            try:
+                _write_atomically(base_path + ".parquet", df.to_parquet)
+                return os.path.basename(base_path) + ".parquet"
+            except Exception:
+                # Mixed-type object columns or non-string headers are not
+                # representable in Parquet.
+                pass
+        _write_atomically(base_path + ".pkl", df.to_pickle)
+        return os.path.basename(base_path) + ".pkl"
+
+    def _entries(self):
+        """Return (key, last_used, size_bytes) for every cache entry."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(key)
+            if not os.path.isdir(entry_dir):
+                continue
+            size = 0
+            for dir_path, _, file_names in os.walk(entry_dir):
+                for name in file_names:
+                    try:
+                        size += os.path.getsize(os.path.join(dir_path, name))
+                    except OSError:
+                        pass
+            try:
+                last_used = os.path.getmtime(os.path.join(entry_dir, self.META_FILE))
+            except OSError:
+                last_used = 0
+            entries.append((key, last_used, size))
+        return entries
+
+    def size_bytes(self):
+        """Return the total size of the cache on disk."""
+        return sum(size for _, _, size in self._entries())
+
+    def _remove_entry(self, key):
+        """Invalidate and delete an entry; return False if it is still mapped and was kept."""
+        if self._in_use(key):
+            return False
+        entry_dir = self._entry_dir(key)
+        # Without meta.json the entry is a miss, so a delete that fails
+        # half-way (files locked on Windows) never leaves a valid-looking entry.
+        try:
+            os.remove(os.path.join(entry_dir, self.META_FILE))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not invalidate cache entry %s: %s", entry_dir, e)
+            return False
+        _remove_tree(entry_dir)
+        return True
+
+    def _evict(self, keep=None):
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        budget = self.max_size_mb * 1024 * 1024
+        for key, _, size in entries:
+            if total <= budget:
+                break
+            if key == keep:
+                continue
+            if self._remove_entry(key):
+                total -= size
+
+    def clear(self):
+        """Remove every cache entry that is not in use; return the number of entries kept."""
+        with self._lock:
+            kept = 0
+            for key, _, _ in self._entries():
+                if not self._remove_entry(key):
+                    kept += 1
+            return kept
+
+
+def _write_atomically(path, write):
+    """Call ``write`` with a temporary path next to ``path`` and rename the result into place."""
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _remove_tree(path):
+    """Delete a directory tree, reporting files that could not be removed."""
+    try:
+        shutil.rmtree(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Could not remove %s from the sheet cache: %s", path, e)
@@ -0,0 +1,228 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import readers
+from column_store import resident_size
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MEMORY_BUDGET_MB = 512
+CSV_EXTENSIONS = (".csv", ".tsv", ".tab")
+CSV_SAMPLE_ROWS = 200
+
+
+class LazySheetStore:
+    """Dictionary-like access to workbook sheets that are parsed on demand.
+
+    Only the sheet names are read when the store is created. A sheet is parsed
+    the first time it is requested and kept in memory until the total size of
+    the parsed sheets exceeds ``memory_budget_mb``, at which point the least
+    recently used sheets are dropped (they are re-parsed on the next access).
+
+    If a :class:`~sheet_cache.SheetCache` is given, sheet names and parsed
+    sheets are looked up there first and the workbook itself is only opened
+    when something is missing from the cache. With ``use_memmap`` the cache
+    converts each sheet once into a memory-mapped column store and the store
+    hands out frames backed by that map; only their non-numeric columns count
+    towards the memory budget.
+    """
+
+    def __init__(self, filepath, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, cache=None, use_memmap=False):
+        """Read the sheet names from the cache or the workbook."""
+        self.filepath = filepath
+        self.memory_budget_mb = memory_budget_mb
+        self.cache = cache
+        self.use_memmap = use_memmap and cache is not None
+        self._xls = None
+        self.sheet_names = list(self._load_sheet_names())
+        self._parsed = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.RLock()
+
+    def _load_sheet_names(self):
+        """Return the sheet names from the cache, or from the workbook on a miss."""
+        sheet_names = self.cache.get_sheet_names(self.filepath) if self.cache else None
+        if sheet_names is None:
+            sheet_names = self._workbook().sheet_names
+            if self.cache:
+                self._write_to_cache(self.cache.put_sheet_names, self.filepath, sheet_names)
+        return sheet_names
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self.sheet_names
+
+    def __len__(self):
+        return len(self.sheet_names)
+
+    def __iter__(self):
+        return iter(self.sheet_names)
+
+    def __getitem__(self, sheet_name):
+        return self.get(sheet_name)
+
+    def keys(self):
+        """Return the sheet names in workbook order."""
+        return list(self.sheet_names)
+
+    def is_loaded(self, sheet_name):
+        """Return True if the sheet is currently held in memory."""
+        return sheet_name in self._parsed
+
+    def get(self, sheet_name):
+        """Return the parsed sheet, parsing it first if necessary."""
+        if sheet_name not in self.sheet_names:
+            raise KeyError(sheet_name)
+        # Sheets may be requested from a background loader thread.
+        with self._lock:
+            if sheet_name in self._parsed:
+                self._parsed.move_to_end(sheet_name)
+                return self._parsed[sheet_name]
+
+            if self.use_memmap:
+                df = self._parse_memmap(sheet_name)
+                size = resident_size(df)
+            else:
+                df = self._parse(sheet_name)
+                size = int(df.memory_usage(index=True, deep=True).sum())
+            self._parsed[sheet_name] = df
+            self._sizes[sheet_name] = size
+            self._evict(keep=sheet_name)
+            return df
+
+    def _workbook(self):
+        """Return the open workbook, opening it on first use."""
+        if self._xls is None:
+            self._xls = readers.ExcelWorkbook(self.filepath)
+        return self._xls
+
+    def _parse(self, sheet_name, store_in_cache=True):
+        """Read a single sheet from the cache or the underlying workbook."""
+        if self.cache:
+            df = self.cache.get_sheet(self.filepath, sheet_name)
+            if df is not None:
+                return df
+        df = self._workbook().parse(sheet_name)
+        if self.cache and store_in_cache:
+            self._write_to_cache(self.cache.put_sheet, self.filepath, sheet_name, df)
+        return df
+
+    def _cache_sheet_key(self, sheet_name):
+        """Return the name the sheet is stored under in the cache."""
+        return sheet_name
+
+    def _parse_memmap(self, sheet_name):
+        """Return a memory-mapped frame for the sheet, converting it on first use."""
+        cache_key = self._cache_sheet_key(sheet_name)
+        df = self.cache.get_memmap_sheet(self.filepath, cache_key)
+        if df is not None:
+            return df
+        return self.cache.put_memmap_sheet(self.filepath, cache_key, self._parse(sheet_name, store_in_cache=False))
+
+    @staticmethod
+    def _write_to_cache(put, *args):
+        """Store data in the cache; a failing cache never breaks loading."""
+        try:
+            put(*args)
+        except Exception as e:
+            logger.warning("Could not write to the sheet cache: %s", e)
+
+    def memory_usage(self):
+        """Return the number of bytes held by the parsed sheets."""
+        return sum(self._sizes.values())
+
+    def set_memory_budget(self, memory_budget_mb):
+        """Change the memory budget and evict sheets that no longer fit."""
+        with self._lock:
+            self.memory_budget_mb = memory_budget_mb
+            self._evict()
+
+    def _evict(self, keep=None):
+        """Drop least recently used sheets until the budget is respected."""
+        budget_bytes = self.memory_budget_mb * 1024 * 1024
+        while self._parsed and self.memory_usage() > budget_bytes:
+            oldest = next(iter(self._parsed))
+            if oldest == keep:
+                # The most recently requested sheet is always kept, even if it
+                # is larger than the budget on its own.
+                if len(self._parsed) == 1:
+                    break
+                self._parsed.move_to_end(oldest)
+                continue
+            del self._parsed[oldest]
+            del self._sizes[oldest]
+
+    def close(self):
+        """Release the parsed sheets and the workbook handle."""
+        with self._lock:
+            self._parsed.clear()
+            self._sizes.clear()
+            if self._xls is not None:
+                try:
+                    self._xls.close()
+                except Exception:
+                    pass
+                self._xls = None
+
+
+def is_csv_file(filepath):
+    """Return True if the file should be read as delimited text."""
+    return filepath.lower().endswith(CSV_EXTENSIONS)
+
+
+def csv_separator(filepath):
+    """Return the field separator implied by the file extension."""
+    return "," if filepath.lower().endswith(".csv") else "\t"
+
+
+def read_csv_header(filepath):
+    """Return the column names of a CSV/TSV file."""
+    return readers.read_csv(filepath, sep=csv_separator(filepath), nrows=0).columns.tolist()
+
+
+def read_csv_fast(filepath, usecols=None):
+    """Read a CSV/TSV file with the fastest available reader engine.
+
+    The type of each column is decided from a small sample: columns that look
+    numeric are read directly as float64 and everything else as text, which
+    skips pandas' per-column type inference over the whole file.
+    """
+    sep = csv_separator(filepath)
+    sample = readers.read_csv(filepath, sep=sep, usecols=usecols, nrows=CSV_SAMPLE_ROWS)
+    dtypes = {col: "float64" if pd.api.types.is_numeric_dtype(sample[col]) and not pd.api.types.is_bool_dtype(sample[col]) else "object"
+              for col in sample.columns}
+    try:
+        return readers.read_csv(filepath, sep=sep, usecols=usecols, dtype=dtypes)
+    except (ValueError, TypeError):
+        # A column that looked numeric in the sample contains text further down.
+        return readers.read_csv(filepath, sep=sep, usecols=usecols)
+
+
+class CsvSheetStore(LazySheetStore):
+    """Sheet store exposing a CSV/TSV file as a workbook with a single sheet.
+
+    ``usecols`` restricts loading to a subset of the columns. Delimited text
+    already parses quickly, so only the memory-mapped mode uses the cache.
+    """
+
+    def __init__(self, filepath, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, cache=None, use_memmap=False, usecols=None):
+        """Use the file name as the only sheet name; nothing is parsed yet."""
+        self.usecols = list(usecols) if usecols else None
+        super().__init__(filepath, memory_budget_mb=memory_budget_mb, cache=cache, use_memmap=use_memmap)
+
+    def _load_sheet_names(self):
+        return [os.path.basename(self.filepath)]
+
+    def _cache_sheet_key(self, sheet_name):
+        if not self.usecols:
+            return sheet_name
+        return sheet_name + "|" + hashlib.sha1("\x1f".join(map(str, self.usecols)).encode("utf-8")).hexdigest()[:12]
+
+    def _parse(self, sheet_name, store_in_cache=True):
+        return read_csv_fast(self.filepath, usecols=self.usecols)
@@ -0,0 +1,363 @@
+"""Statistics of the Y columns of a row range, computed for all columns at once.
+
+The numeric Y columns are stacked into one 2-D float array and every
+statistic is a single NaN-aware NumPy reduction over its rows, instead of a
+``dropna`` and a separate pandas call per column and statistic. Results are
+cached by :class:`StatisticsCache`, so toggling which statistics are shown
+or writing a report does not compute them again.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from column_store import is_memory_mapped
+
+
+STATISTIC_KEYS = ("max", "min", "mean", "std", "median", "idxmax_x", "idxmin_x")
+
+MISSING_COLUMN = "列なし"
+NOT_NUMERIC = "非数値データ"
+ALL_NAN = "NaNのみ"
+
+DEFAULT_INDEX_MEMORY_MB = 256
+
+
+def compute_column_statistics(df, x_col, y_cols):
+    """Return ``{y_col: {statistic key: value}}`` for the rows of ``df``.
+
+    Columns that cannot be summarized map to a status string instead
+    (:data:`MISSING_COLUMN`, :data:`NOT_NUMERIC` or :data:`ALL_NAN`). The
+    standard deviation is the sample one (``ddof=1``) like pandas; the X
+    coordinates of the extrema are those of their first occurrence, or None
+    if the X column is missing or not numeric or the X value is NaN.
+    """
+    results = {}
+    numeric_cols = []
+    for y_col in y_cols:
+        if y_col not in df.columns:
+            results[y_col] = MISSING_COLUMN
+        elif not pd.api.types.is_numeric_dtype(df[y_col]):
+            results[y_col] = NOT_NUMERIC
+        elif y_col not in numeric_cols:
+            numeric_cols.append(y_col)
+    if not numeric_cols:
+        return results
+
+    # Column-major, so every reduction below runs over contiguous memory.
+    values = np.empty((len(df), len(numeric_cols)), dtype=np.float64, order="F")
+    for i, y_col in enumerate(numeric_cols):
+        values[:, i] = df[y_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    has_values = counts > 0
+    if valid.all():
+        argmax, argmin, sums = values.argmax(axis=0), values.argmin(axis=0), values.sum(axis=0)
+    else:
+        argmax = np.where(valid, values, -np.inf).argmax(axis=0)
+        argmin = np.where(valid, values, np.inf).argmin(axis=0)
+        sums = np.where(valid, values, 0.0).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        deviations = np.where(valid, values - means, 0.0)
+        stds = np.sqrt((deviations * deviations).sum(axis=0) / (counts - 1))
+    stds[counts < 2] = np.nan
+    # Sorting moves the NaNs of each column to its end, so the median is the
+    # middle of the first ``count`` values.
+    ordered = np.sort(values, axis=0)
+    columns = np.arange(len(numeric_cols))
+    last = np.maximum(counts - 1, 0)
+    medians = (ordered[last // 2, columns] + ordered[(last + 1) // 2, columns]) / 2
+
+    x_values = None
+    if x_col in df.columns and pd.api.types.is_numeric_dtype(df[x_col]):
+        x_values = df[x_col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def x_at(row):
+        if x_values is None or np.isnan(x_values[row]):
+            return None
+        return float(x_values[row])
+
+    for i, y_col in enumerate(numeric_cols):
+        if not has_values[i]:
+            results[y_col] = ALL_NAN
+            continue
+        results[y_col] = {
+            "max": float(values[argmax[i], i]),
+            "min": float(values[argmin[i], i]),
+            "mean": float(means[i]),
+            "std": float(stds[i]),
+            "median": float(medians[i]),
+            "idxmax_x": x_at(argmax[i]),
+            "idxmin_x": x_at(argmin[i]),
+        }
+    return results
+
+
+class ColumnRangeIndex:
+    """Answers max/min/mean/std queries for any row range of one column in constant time.
+
+    Built once per column: prefix sums of the values and of their squares
+    (shifted by the column mean to limit cancellation), prefix counts of the
+    non-NaN values, and for the extrema the first arg-max/arg-min of every
+    block of :attr:`BLOCK_SIZE` rows plus a sparse table over the blocks. A
+    query reads the prefix sums at both ends, scans at most two partial
+    blocks and looks up the full blocks in between with two table reads.
+    The standard deviation falls back to reading the range when the prefix
+    sums cannot give it to full precision (see :meth:`std`).
+    """
+
+    BLOCK_SIZE = 256
+    DIRECT_STD_RATIO = 1e-3
+
+    def __init__(self, values):
+        """Index a 1-D array of values; NaN marks missing samples."""
+        self.values = np.asarray(values, dtype=np.float64)
+        self.n = len(self.values)
+        valid = ~np.isnan(self.values)
+        self.shift = float(self.values[valid].mean()) if valid.any() else 0.0
+        shifted = np.where(valid, self.values - self.shift, 0.0)
+        self.sums = np.concatenate(([0.0], np.cumsum(shifted)))
+        self.squares = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+        self.counts = np.concatenate(([0], np.cumsum(valid)))
+        self._max_levels = self._sparse_table(np.where(valid, self.values, -np.inf), np.greater)
+        self._min_levels = self._sparse_table(np.where(valid, self.values, np.inf), np.less)
+
+    def _sparse_table(self, filled, better):
+        """Return levels of (rows, values); level k covers 2**k consecutive blocks."""
+        n_blocks = -(-self.n // self.BLOCK_SIZE)
+        padded = np.full(n_blocks * self.BLOCK_SIZE, -np.inf if better is np.greater else np.inf)
+        padded[:self.n] = filled
+        blocks = padded.reshape(n_blocks, self.BLOCK_SIZE)
+        offsets = blocks.argmax(axis=1) if better is np.greater else blocks.argmin(axis=1)
+        rows = np.arange(n_blocks) * self.BLOCK_SIZE + offsets
+        levels = [(rows, blocks[np.arange(n_blocks), offsets])]
+        width = 1
+        while 2 * width <= n_blocks:
+            rows, values = levels[-1]
+            left, right = slice(0, len(rows) - width), slice(width, len(rows))
+            take_right = better(values[right], values[left])
+            levels.append((np.where(take_right, rows[right], rows[left]), np.where(take_right, values[right], values[left])))
+            width *= 2
+        return levels
+
+    @property
+    def nbytes(self):
+        """Return the bytes held by the index arrays (and by the values if they were copied)."""
+        arrays = [self.sums, self.squares, self.counts]
+        arrays += [array for levels in (self._max_levels, self._min_levels) for level in levels for array in level]
+        if self.values.base is None:
+            arrays.append(self.values)
+        return sum(array.nbytes for array in arrays)
+
+    def count(self, start, stop):
+        """Return the number of non-NaN values in rows [start, stop)."""
+        return int(self.counts[stop] - self.counts[start])
+
+    def mean(self, start, stop):
+        """Return the mean of the non-NaN values in rows [start, stop)."""
+        return self.shift + (self.sums[stop] - self.sums[start]) / self.count(start, stop)
+
+    def std(self, start, stop):
+        """Return the sample standard deviation (``ddof=1``) of rows [start, stop)."""
+        count = self.count(start, stop)
+        if count < 2:
+            return np.nan
+        total = self.sums[stop] - self.sums[start]
+        squares = self.squares[stop] - self.squares[start]
+        spread = squares - total * total / count
+        # The prefix sums carry rounding errors of the order of the running
+        # sum of squares. When the spread of the range is small next to it
+        # (a short range, or one whose mean is far from the column mean), the
+        # difference would lose most of its digits, so the rows are read instead.
+        if spread <= self.squares[stop] * self.DIRECT_STD_RATIO:
+            return float(np.nanstd(self.values[start:stop], ddof=1))
+        return float(np.sqrt(spread / (count - 1)))
+
+    def max_row(self, start, stop):
+        """Return the row of the first maximum in [start, stop), or None if all values are NaN."""
+        return self._extremum_row(start, stop, self._max_levels, np.greater)
+
+    def min_row(self, start, stop):
+        """Return the row of the first minimum in [start, stop), or None if all values are NaN."""
+        return self._extremum_row(start, stop, self._min_levels, np.less)
+
+    def _scan(self, start, stop, better):
+        chunk = self.values[start:stop]
+        if better is np.greater:
+            offset = int(np.where(np.isnan(chunk), -np.inf, chunk).argmax())
+        else:
+            offset = int(np.where(np.isnan(chunk), np.inf, chunk).argmin())
+        return start + offset
+
+    def _extremum_row(self, start, stop, levels, better):
+        if self.count(start, stop) == 0:
+            return None
+        first_block = -(-start // self.BLOCK_SIZE)
+        last_block = stop // self.BLOCK_SIZE
+        if last_block - first_block < 1:
+            return self._scan(start, stop, better)
+        # Candidates in row order, so ties keep the earliest row.
+        candidates = []
+        if start < first_block * self.BLOCK_SIZE:
+            candidates.append(self._scan(start, first_block * self.BLOCK_SIZE, better))
+        level = int(np.log2(last_block - first_block))
+        rows = levels[level][0]
+        candidates.append(int(rows[first_block]))
+        candidates.append(int(rows[last_block - (1 << level)]))
+        if last_block * self.BLOCK_SIZE < stop:
+            candidates.append(self._scan(last_block * self.BLOCK_SIZE, stop, better))
+        best = None
+        for row in candidates:
+            value = self.values[row]
+            if np.isnan(value):
+                continue
+            if best is None or better(value, self.values[best]):
+                best = row
+        return best
+
+
+class RangeStatistics:
+    """Range indexes of sheet columns, built on first use and reused for every row range.
+
+    Indexes are kept per (sheet, column) for the most recently used columns
+    while their arrays fit in ``max_memory_mb``. Only the median still reads
+    the rows of the range; every other statistic is answered by
+    :class:`ColumnRangeIndex`. Memory-mapped columns (大容量モード) are not
+    indexed, because the full-length index arrays would pull the size of the
+    file into RAM; their ranges are summarized from the rows instead.
+    """
+
+    def __init__(self, max_memory_mb=DEFAULT_INDEX_MEMORY_MB):
+        """Keep indexes up to ``max_memory_mb`` in total."""
+        self.max_memory_mb = max_memory_mb
+        self._indexes = OrderedDict()
+
+    def column_index(self, sheet_name, df, column):
+        """Return the index of ``df[column]``, building it if needed, or None for memory-mapped columns."""
+        key = (sheet_name, column)
+        index = self._indexes.get(key)
+        if index is None or index.n != len(df):
+            values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            if is_memory_mapped(values):
+                return None
+            index = ColumnRangeIndex(values)
+            self._indexes[key] = index
+            self._evict(keep=key)
+        else:
+            self._indexes.move_to_end(key)
+        return index
+
+    def _evict(self, keep):
+        budget = self.max_memory_mb * 1024 * 1024
+        total = sum(index.nbytes for index in self._indexes.values())
+        while total > budget and len(self._indexes) > 1:
+            key, index = next(iter(self._indexes.items()))
+            if key == keep:
+                break
+            del self._indexes[key]
+            total -= index.nbytes
+
+    def extremum_row(self, sheet_name, df, column, start, stop, largest=True):
+        """Return the row of the first maximum (or minimum) of ``df[column]`` in [start, stop), or None if all are NaN."""
+        index = self.column_index(sheet_name, df, column)
+        if index is not None:
+            return index.max_row(start, stop) if largest else index.min_row(start, stop)
+        chunk = df[column].iloc[start:stop].to_numpy(dtype=np.float64, na_value=np.nan)
+        if np.isnan(chunk).all():
+            return None
+        return start + int(np.nanargmax(chunk) if largest else np.nanargmin(chunk))
+
+    def statistics(self, sheet_name, df, x_col, y_cols, start, stop):
+        """Return the statistics of rows [start, stop) of the whole sheet ``df``.
+
+        The result has the same form as :func:`compute_column_statistics`.
+        """
+        results = {}
+        x_values = None
+        if x_col in df.columns and pd.api.types.is_numeric_dtype(df[x_col]):
+            x_values = df[x_col]
+
+        def x_at(row):
+            if x_values is None:
+                return None
+            value = x_values.iloc[row]
+            return None if pd.isna(value) else float(value)
+
+        unindexed = []
+        for y_col in y_cols:
+            if y_col not in df.columns:
+                results[y_col] = MISSING_COLUMN
+                continue
+            if not pd.api.types.is_numeric_dtype(df[y_col]):
+                results[y_col] = NOT_NUMERIC
+                continue
+            index = self.column_index(sheet_name, df, y_col)
+            if index is None:
+                unindexed.append(y_col)
+                continue
+            if index.count(start, stop) == 0:
+                results[y_col] = ALL_NAN
+                continue
+            max_row, min_row = index.max_row(start, stop), index.min_row(start, stop)
+            results[y_col] = {
+                "max": float(index.values[max_row]),
+                "min": float(index.values[min_row]),
+                "mean": float(index.mean(start, stop)),
+                "std": index.std(start, stop),
+                "median": float(np.nanmedian(index.values[start:stop])),
+                "idxmax_x": x_at(max_row),
+                "idxmin_x": x_at(min_row),
+            }
+        if unindexed:
+            results.update(compute_column_statistics(df.iloc[start:stop], x_col, unindexed))
+        return {y_col: results[y_col] for y_col in y_cols}
+
+    def clear(self):
+        """Forget every index."""
+        self._indexes.clear()
+
+
+class StatisticsCache:
+    """Least-recently-used cache of statistics results.
+
+    Entries are keyed by the sheet, the row range and the X/Y columns; the
+    caller clears the cache when different data is loaded under the same
+    sheet names. When the row range of the whole sheet is given, the results
+    come from :class:`RangeStatistics`, so a new range costs (almost) nothing
+    once the columns have been indexed.
+    """
+
+    def __init__(self, max_entries=64):
+        """Keep at most ``max_entries`` results."""
+        self.max_entries = max_entries
+        self.ranges = RangeStatistics()
+        self._entries = OrderedDict()
+
+    def get(self, sheet_name, df, x_col, y_cols, rows=None):
+        """Return the statistics of ``df``, computing them on a miss.
+
+        ``df`` is either the sliced sheet (``rows`` None) or the whole sheet
+        with ``rows`` the ``(start, stop)`` positions of the range.
+        """
+        if rows is None:
+            rows_key = (df.index[0], df.index[-1], len(df)) if len(df) else (None, None, 0)
+        else:
+            rows_key = tuple(rows)
+        key = (sheet_name, rows is None, rows_key, x_col, tuple(y_cols))
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if rows is None:
+            results = compute_column_statistics(df, x_col, y_cols)
+        else:
+            results = self.ranges.statistics(sheet_name, df, x_col, y_cols, *rows)
+        self._entries[key] = results
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return results
+
+    def clear(self):
+        """Forget every cached result and range index."""
+        self._entries.clear()
+        self.ranges.clear()
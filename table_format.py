@@ -0,0 +1,158 @@
+"""Format DataFrame columns as text with NumPy instead of a Python loop per cell.
+
+Used for the data table, copying it to the clipboard and writing it as CSV.
+Floats with a fixed number of decimals are built from integer arrays: the
+value is scaled, split into integer and fractional digits, and both parts are
+looked up in tables of precomputed strings. Values close to a rounding tie, which the scaled
+multiplication may round differently, are formatted with Python's ``%``
+operator, so the result matches ``f"{value:.{precision}f}"`` exactly.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_PRECISION = 3
+# Beyond this the scaled value no longer fits exactly in a float64 mantissa.
+_MAX_EXACT_SCALED = 2.0 ** 52
+# Integer parts and decimal fractions up to these sizes are looked up in
+# tables of ready-made strings instead of being converted.
+_INTEGER_TABLE_SIZE = 100000
+_MAX_FRACTION_TABLE_PRECISION = 5
+
+_integer_tables = None
+_fraction_tables = {}
+
+
+def _integer_strings(numbers, negative):
+    """Return ``numbers`` (non-negative int64) as decimal strings, with a minus sign where ``negative``."""
+    global _integer_tables
+    if len(numbers) and numbers.max() < _INTEGER_TABLE_SIZE:
+        if _integer_tables is None:
+            positive_table = np.array([str(i) for i in range(_INTEGER_TABLE_SIZE)], dtype=object)
+            _integer_tables = (positive_table, "-" + positive_table)
+        positive_table, negative_table = _integer_tables
+        return np.where(negative, negative_table[numbers], positive_table[numbers])
+    text = numbers.astype(str).astype(object)
+    text[negative] = "-" + text[negative]
+    return text
+
+
+def _fraction_strings(numbers, precision):
+    """Return ``numbers`` (0 <= n < 10**precision) as ``".ddd"`` strings padded to ``precision`` digits."""
+    if precision > _MAX_FRACTION_TABLE_PRECISION:
+        return np.char.add(".", np.char.zfill(numbers.astype(str), precision)).astype(object)
+    if precision not in _fraction_tables:
+        _fraction_tables[precision] = np.array([f".{i:0{precision}d}" for i in range(10 ** precision)], dtype=object)
+    return _fraction_tables[precision][numbers]
+
+
+def _format_fixed(values, precision):
+    """Return finite float64 ``values`` formatted with ``precision`` decimals."""
+    scale = 10 ** precision
+    scaled = np.abs(values) * scale
+    rounded = np.round(scaled)
+    # The product carries a relative error of about one ulp, so values this
+    # close to a tie are left to Python, which rounds the exact binary value.
+    tolerance = np.maximum(1e-6, scaled * 1e-15)
+    slow = (np.abs(scaled - np.floor(scaled) - 0.5) < tolerance) | (rounded >= _MAX_EXACT_SCALED)
+    digits = np.where(slow, 0, rounded).astype(np.int64)
+    text = _integer_strings(digits // scale, np.signbit(values))
+    if precision > 0:
+        text = text + _fraction_strings(digits % scale, precision)
+    if slow.any():
+        fmt = f"%.{precision}f"
+        text[slow] = [fmt % value for value in values[slow].tolist()]
+    return text
+
+
+def format_column(values, precision=DEFAULT_PRECISION, na_rep=""):
+    """Return an object array of display strings for one column.
+
+    Floats get ``precision`` decimals (``None`` keeps the shortest exact
+    representation, as ``repr`` does). Integers are shown with ``precision``
+    decimals like floats, as the data table always did, and written as they
+    are with ``None``. Booleans are written as they are, missing values as
+    ``na_rep`` and anything else with ``str``.
+    """
+    values = np.asarray(values)
+    kind = values.dtype.kind
+    if kind in "iu" and precision is not None:
+        values = values.astype(np.float64)
+        kind = "f"
+    if kind in "iub":
+        return values.astype(str).astype(object)
+    if kind == "f":
+        values = values.astype(np.float64, copy=False)
+        text = np.full(len(values), na_rep, dtype=object)
+        finite = np.isfinite(values)
+        if precision is None:
+            text[finite] = list(map(repr, values[finite].tolist()))
+        else:
+            text[finite] = _format_fixed(values[finite], precision)
+        text[np.isposinf(values)] = "inf"
+        text[np.isneginf(values)] = "-inf"
+        return text
+    missing = pd.isna(values)
+    return np.array([na_rep if is_missing else str(value) for value, is_missing in zip(values.tolist(), missing.tolist())], dtype=object)
+
+
+def _quote(text, sep):
+    """Quote a field the way the csv module does when it contains the separator, quotes or newlines."""
+    if sep in text or '"' in text or "\n" in text or "\r" in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def format_table(df, sep="\t", precision=DEFAULT_PRECISION, na_rep="", header=True, quote=False, lineterminator="\n"):
+    """Return ``df`` as delimited text, one line per row, without the index.
+
+    With ``quote`` text fields that contain the separator, quotes or
+    newlines are quoted as in CSV; numeric columns never need it.
+    """
+    columns = []
+    for i in range(df.shape[1]):
+        text = format_column(df.iloc[:, i].to_numpy(), precision, na_rep)
+        if quote and df.dtypes.iloc[i].kind not in "iufb":
+            text = np.array([_quote(value, sep) for value in text.tolist()], dtype=object)
+        columns.append(text.tolist())
+    lines = list(map(sep.join, zip(*columns))) if columns else [""] * len(df)
+    if header:
+        names = [str(name) for name in df.columns]
+        lines.insert(0, sep.join(_quote(name, sep) for name in names) if quote else sep.join(names))
+    return lineterminator.join(lines) + lineterminator
+
+
+def _is_plain_column(series):
+    """Return True if :func:`format_column` writes the column exactly like ``DataFrame.to_csv``.
+
+    That holds for NumPy float64 and int64 columns and for text columns
+    holding only strings; float32, nullable, datetime-like and other
+    extension columns are formatted differently by pandas.
+    """
+    dtype = series.dtype
+    if dtype == np.float64 or dtype == np.int64:
+        return True
+    return (dtype == object or isinstance(dtype, pd.StringDtype)) and pd.api.types.is_string_dtype(series)
+
+
+def write_csv(df, path, precision=None, sep=",", na_rep="", encoding="utf-8", lineterminator=None):
+    """Write ``df`` to ``path`` as CSV without the index, byte for byte like ``DataFrame.to_csv``.
+
+    ``precision=None`` writes floats at full precision and lines end with
+    ``os.linesep`` unless ``lineterminator`` is given, as pandas does. Frames
+    with columns of other types than those of :func:`_is_plain_column` (or
+    a single column, whose empty cells the csv module quotes) are written
+    by ``DataFrame.to_csv`` itself.
+    """
+    if lineterminator is None:
+        lineterminator = os.linesep
+    names_plain = all(isinstance(name, (str, int, float)) for name in df.columns)
+    if df.shape[1] < 2 or not names_plain or not all(_is_plain_column(df.iloc[:, i]) for i in range(df.shape[1])):
+        float_format = None if precision is None else f"%.{precision}f"
+        df.to_csv(path, sep=sep, na_rep=na_rep, encoding=encoding, lineterminator=lineterminator,
+                  float_format=float_format, index=False)
+        return
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write(format_table(df, sep=sep, precision=precision, na_rep=na_rep, quote=True, lineterminator=lineterminator))
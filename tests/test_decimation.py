@@ -0,0 +1,49 @@
+"""Checks that the decimation reducers keep the extremes of a recording."""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decimation import decimate_for_view, lttb_indices, minmax_indices
+
+
+def recording(n=200000):
+    x = np.arange(n) / 1000.0
+    y = np.sin(x * 3.0) * 100.0
+    y[123457] = 950.0
+    y[45678] = -870.0
+    return x, y
+
+
+def test_minmax_keeps_peaks_and_endpoints():
+    x, y = recording()
+    indices = minmax_indices(y, 800)
+    assert len(indices) <= 2 * 800 + 2
+    assert {0, len(y) - 1, 123457, 45678} <= set(indices.tolist())
+
+
+def test_lttb_keeps_isolated_peaks():
+    x, y = recording()
+    indices = lttb_indices(x, y, 2000)
+    assert len(indices) <= 2000
+    assert {0, len(y) - 1, 123457, 45678} <= set(indices.tolist())
+
+
+def test_decimate_for_view_keeps_range_and_extremes():
+    x, y = recording()
+    for method in ("minmax", "lttb"):
+        x_out, y_out = decimate_for_view(x, y, (40.0, 130.0), pixels=500, method=method)
+        assert len(x_out) <= 1000 + 2
+        assert x_out[0] <= 40.0 and x_out[-1] >= 130.0
+        assert y_out.max() == 950.0 and y_out.min() == -870.0
+
+
+def test_unsorted_or_short_series_are_unchanged():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.cos(x)
+    assert len(decimate_for_view(x, y, pixels=10)[0]) == 1000
+    shuffled = np.random.default_rng(0).permutation(200000).astype(np.float64)
+    x_out, y_out = decimate_for_view(shuffled, np.zeros(200000), pixels=10)
+    assert len(x_out) == len(y_out) == 200000
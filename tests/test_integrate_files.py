@@ -0,0 +1,65 @@
+"""Checks that both integration paths write what ``pd.concat`` would."""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrate_files import parallel_integrate, stream_integrate
+
+
+def write_inputs(directory):
+    frames = [
+        pd.DataFrame({"time": [0.0, 0.5, 1.0], "a": [1, 2, 3], "b": [0.1, 0.2, 0.3]}),
+        pd.DataFrame({"time": [1.5, 2.0], "b": [0.4, None], "c": ["x", "y"]}),
+        pd.DataFrame({"a": [4, 5, 6, 7], "time": [2.5, 3.0, 3.5, 4.0]}),
+    ]
+    paths = []
+    for i, df in enumerate(frames):
+        path = os.path.join(directory, f"input_{i}.csv")
+        df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def expected_csv(paths):
+    return pd.concat([pd.read_csv(path) for path in paths], ignore_index=True).to_csv(index=False)
+
+
+def integrate(method, paths, save_path):
+    if method == "stream":
+        return stream_integrate(paths, save_path, chunksize=2)
+    return parallel_integrate(paths, save_path, max_workers=2)
+
+
+@pytest.mark.parametrize("method", ["stream", "parallel"])
+def test_output_matches_concat(tmp_path, method):
+    paths = write_inputs(str(tmp_path))
+    save_path = str(tmp_path / "out.csv")
+    assert integrate(method, paths, save_path) == (save_path, [])
+    with open(save_path, encoding="utf-8") as f:
+        assert f.read() == expected_csv(paths)
+
+
+@pytest.mark.parametrize("method", ["stream", "parallel"])
+def test_unreadable_files_are_skipped(tmp_path, method):
+    paths = write_inputs(str(tmp_path))
+    missing = str(tmp_path / "missing.csv")
+    broken = str(tmp_path / "broken.csv")
+    with open(broken, "w", encoding="utf-8") as f:
+        f.write("time,a\n" + "9.0,9\n" * 5 + "1,2,3,4\n")
+    save_path = str(tmp_path / "out.csv")
+    _, failures = integrate(method, [paths[0], missing, paths[1], broken, paths[2]], save_path)
+    assert [path for path, _ in failures] == [missing, broken]
+    with open(save_path, encoding="utf-8") as f:
+        assert f.read() == expected_csv(paths)
+
+
+@pytest.mark.parametrize("method", ["stream", "parallel"])
+def test_no_readable_file_raises(tmp_path, method):
+    save_path = str(tmp_path / "out.csv")
+    with pytest.raises(RuntimeError):
+        integrate(method, [str(tmp_path / "missing.csv")], save_path)
+    assert not os.path.exists(save_path)
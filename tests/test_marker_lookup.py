@@ -0,0 +1,47 @@
+"""Checks of the binary-search marker lookup against the pandas idxmin it replaced."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from marker_lookup import XLookup, marker_values
+
+
+def test_nearest_rows_match_idxmin():
+    rng = np.random.default_rng(0)
+    x = pd.Series(np.round(np.sort(rng.uniform(0, 10, 2000)), 2))
+    x[rng.integers(0, 2000, 50)] = np.nan
+    targets = np.concatenate([rng.uniform(-1, 11, 300), x.dropna().sample(50, random_state=1).to_numpy(), [np.nan]])
+    rows = XLookup(x.to_numpy()).nearest_rows(targets)
+    for target, row in zip(targets, rows):
+        if np.isnan(target):
+            assert row == -1
+        else:
+            assert row == (x - target).abs().idxmin()
+
+
+def test_nearest_rows_unsorted_x_match_idxmin():
+    rng = np.random.default_rng(1)
+    x = pd.Series(rng.integers(0, 200, 1000).astype(np.float64))
+    targets = rng.uniform(-5, 205, 200)
+    rows = XLookup(x.to_numpy()).nearest_rows(targets)
+    assert rows.tolist() == [(x - target).abs().idxmin() for target in targets]
+
+
+def test_marker_values_nearest_and_interpolated():
+    x = np.linspace(0.0, 1.0, 101)
+    y = np.column_stack([x * 10.0, x ** 2])
+    targets = np.array([0.123, 0.5, -1.0, 2.0])
+    nearest = marker_values(x, [y[:, 0], y[:, 1]], targets)
+    np.testing.assert_allclose(nearest[:, 0], [1.2, 5.0, 0.0, 10.0])
+    interpolated = marker_values(XLookup(x), [y[:, 0], y[:, 1]], targets, interpolate=True)
+    np.testing.assert_allclose(interpolated[:, 0], np.interp(targets, x, y[:, 0]))
+    np.testing.assert_allclose(interpolated[:, 1], np.interp(targets, x, y[:, 1]))
+
+
+def test_marker_values_without_x_values():
+    result = marker_values(np.full(5, np.nan), [np.arange(5)], [1.0, 2.0])
+    assert np.isnan(result).all()
@@ -0,0 +1,53 @@
+"""Checks of the on-disk sheet cache."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sheet_cache import SheetCache
+
+
+def source_file(tmp_path):
+    path = tmp_path / "recording.xlsx"
+    path.write_bytes(b"placeholder workbook")
+    return str(path)
+
+
+def sheet():
+    return pd.DataFrame({"time": np.arange(10) / 10.0, "signal": np.arange(10) ** 2, "label": list("abcdefghij")})
+
+
+def test_sheet_round_trip(tmp_path):
+    cache = SheetCache(str(tmp_path / "cache"))
+    path = source_file(tmp_path)
+    assert cache.get_sheet(path, "Sheet1") is None
+    cache.put_sheet_names(path, ["Sheet1", "Sheet2"])
+    cache.put_sheet(path, "Sheet1", sheet())
+    assert cache.get_sheet_names(path) == ["Sheet1", "Sheet2"]
+    pd.testing.assert_frame_equal(cache.get_sheet(path, "Sheet1"), sheet())
+    assert cache.get_sheet(path, "Sheet2") is None
+
+
+def test_changed_source_is_a_miss(tmp_path):
+    cache = SheetCache(str(tmp_path / "cache"))
+    path = source_file(tmp_path)
+    cache.put_sheet(path, "Sheet1", sheet())
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get_sheet(path, "Sheet1") is None
+    assert cache.get_sheet_names(path) is None
+
+
+def test_memmap_round_trip_and_clear(tmp_path):
+    cache = SheetCache(str(tmp_path / "cache"))
+    path = source_file(tmp_path)
+    df = sheet()[["time", "signal"]].astype(np.float64)
+    mapped = cache.put_memmap_sheet(path, "Sheet1", df)
+    pd.testing.assert_frame_equal(mapped, df)
+    pd.testing.assert_frame_equal(cache.get_memmap_sheet(path, "Sheet1"), df)
+    del mapped
+    cache.clear()
+    assert cache.get_sheet(path, "Sheet1") is None
@@ -0,0 +1,39 @@
+"""Regression checks of the range standard deviation against pandas."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from statistics_engine import ColumnRangeIndex
+
+
+def assert_matches_pandas(values, ranges):
+    index = ColumnRangeIndex(values)
+    series = pd.Series(values)
+    for start, stop in ranges:
+        expected = series.iloc[start:stop].std()
+        np.testing.assert_allclose(index.std(start, stop), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_equal_values_have_zero_std():
+    rng = np.random.default_rng(2)
+    values = np.concatenate([rng.normal(0, 0.3, 20000), np.full(10, 712.3), rng.normal(0, 0.3, 20000)])
+    assert ColumnRangeIndex(values).std(20002, 20004) == 0.0
+
+
+def test_short_window_far_from_column_mean():
+    rng = np.random.default_rng(0)
+    force = np.concatenate([rng.normal(0, 0.3, 20000), 700 + rng.normal(0, 0.4, 30000), rng.normal(0, 0.3, 20000)])
+    assert_matches_pandas(force, [(25000, 25010), (19990, 20010), (0, 70000), (20000, 50000)])
+
+
+def test_large_offset_and_random_ranges():
+    rng = np.random.default_rng(1)
+    values = 1e6 + rng.normal(0, 1.1, 50000)
+    values[rng.random(50000) < 0.05] = np.nan
+    starts = rng.integers(0, 49990, 500)
+    ranges = [(int(a), int(min(50000, a + 2 + rng.integers(0, 50000 - a)))) for a in starts]
+    assert_matches_pandas(values, ranges + [(100, 110), (0, 50000)])
@@ -0,0 +1,75 @@
+"""Checks of the vectorized table formatting against pandas and f-strings."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from table_format import format_column, write_csv
+
+
+def written_by_pandas(df, tmp_path, **kwargs):
+    path = tmp_path / "pandas.csv"
+    df.to_csv(path, index=False, **kwargs)
+    return path.read_bytes()
+
+
+def written_by_write_csv(df, tmp_path, **kwargs):
+    path = tmp_path / "write_csv.csv"
+    write_csv(df, path, **kwargs)
+    return path.read_bytes()
+
+
+def plain_frame(n=200):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "force": rng.normal(size=n) * 10.0 ** rng.integers(-8, 12, n),
+        "count": rng.integers(-1000, 1000, n),
+        "label": pd.Series(["a", "b,c", 'q"x', "", "line\nbreak"] * (n // 5), dtype=object),
+        "event": ["heel strike"] * n,
+    })
+    df.loc[3, "force"] = np.nan
+    df.loc[7, "event"] = np.nan
+    return df
+
+
+def test_write_csv_matches_to_csv_for_plain_columns(tmp_path):
+    df = plain_frame()
+    assert written_by_write_csv(df, tmp_path) == written_by_pandas(df, tmp_path)
+
+
+@pytest.mark.parametrize("lineterminator", ["\n", "\r\n"])
+def test_write_csv_matches_to_csv_for_mixed_dtypes(tmp_path, lineterminator):
+    n = 20
+    df = plain_frame(n).assign(
+        float32=np.linspace(0.1, 3.3, n, dtype=np.float32),
+        elapsed=pd.to_timedelta(np.arange(n), unit="s"),
+        nullable=pd.array(list(range(n - 1)) + [None], dtype="Int64"),
+        flag=[True, False] * (n // 2),
+        time=pd.date_range("2024-01-01", periods=n, freq="h"),
+    )
+    assert (written_by_write_csv(df, tmp_path, lineterminator=lineterminator)
+            == written_by_pandas(df, tmp_path, lineterminator=lineterminator))
+
+
+def test_write_csv_matches_to_csv_for_one_column(tmp_path):
+    df = pd.DataFrame({"force": [1.5, np.nan, 2.0]})
+    assert written_by_write_csv(df, tmp_path) == written_by_pandas(df, tmp_path)
+
+
+@pytest.mark.parametrize("precision", [0, 1, 3, 6])
+def test_format_column_matches_fstrings(precision):
+    rng = np.random.default_rng(precision)
+    values = np.concatenate([rng.normal(size=5000) * 10.0 ** rng.integers(-6, 8, 5000),
+                             np.arange(-50, 50) / 8, [0.0, -0.0, 0.5, 1.5, 2.5, 1e17]])
+    expected = [f"{value:.{precision}f}" for value in values]
+    assert format_column(values, precision).tolist() == expected
+
+
+def test_format_column_missing_and_integers():
+    assert format_column(np.array([1.0, np.nan, np.inf]), 2).tolist() == ["1.00", "", "inf"]
+    assert format_column(np.array([12, -3]), 3).tolist() == ["12.000", "-3.000"]
+    assert format_column(np.array([12, -3]), None).tolist() == ["12", "-3"]
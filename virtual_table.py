@@ -0,0 +1,115 @@
+"""Treeview table that only creates items for the rows scrolled into view."""
+from tkinter import ttk
+
+import numpy as np
+
+from table_format import DEFAULT_PRECISION, format_column
+
+
+def format_rows(arrays, start, stop, precision=DEFAULT_PRECISION):
+    """Return rows ``start:stop`` of the column arrays as tuples of display strings."""
+    columns = [format_column(values[start:stop], precision).tolist() for values in arrays]
+    return list(zip(*columns))
+
+
+class VirtualTable(ttk.Frame):
+    """Scrollable table of a DataFrame with one Treeview item per visible row.
+
+    A Treeview holding every row of a long recording takes minutes to fill
+    and hundreds of MB of Tk items. This table keeps the column arrays and
+    rewrites the values of a fixed set of items whenever the view moves, so
+    opening and scrolling cost the same for any number of rows. The
+    vertical scrollbar and the mouse wheel move the row offset instead of
+    scrolling the Treeview.
+    """
+
+    DEFAULT_PAGE_ROWS = 25
+    WHEEL_ROWS = 3
+
+    def __init__(self, master, df, precision=DEFAULT_PRECISION, column_width=100):
+        """Show ``df``; its columns are read with ``to_numpy`` (no copy for numeric frames)."""
+        super().__init__(master)
+        self.columns = [str(col) for col in df.columns]
+        self.n_rows = len(df)
+        self.precision = precision
+        self.arrays = [df.iloc[:, i].to_numpy() for i in range(df.shape[1])]
+        self.first_row = 0
+        self.page_rows = min(self.DEFAULT_PAGE_ROWS, self.n_rows)
+        self.items = []
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show="headings")
+        for col in self.columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=column_width, anchor="center", minwidth=50)
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+        self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+        self.vsb.pack(side="right", fill="y")
+        self.hsb.pack(side="bottom", fill="x")
+        self.tree.pack(expand=True, fill="both")
+
+        self.tree.bind("<Configure>", self.on_configure)
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.on_mouse_wheel(event, -1))
+        self.tree.bind("<Button-5>", lambda event: self.on_mouse_wheel(event, 1))
+        self.tree.bind("<Prior>", lambda event: self.scroll_by(-self.page_rows))
+        self.tree.bind("<Next>", lambda event: self.scroll_by(self.page_rows))
+        self.tree.bind("<Home>", lambda event: self.scroll_to(0))
+        self.tree.bind("<End>", lambda event: self.scroll_to(self.n_rows))
+        self.refresh()
+
+    def refresh(self):
+        """Write the rows of the current page into the Treeview items."""
+        stop = min(self.first_row + self.page_rows, self.n_rows)
+        rows = format_rows(self.arrays, self.first_row, stop, self.precision)
+        while len(self.items) < len(rows):
+            self.items.append(self.tree.insert("", "end"))
+        while len(self.items) > len(rows):
+            self.tree.delete(self.items.pop())
+        for item, values in zip(self.items, rows):
+            self.tree.item(item, values=values)
+        if self.n_rows:
+            self.vsb.set(self.first_row / self.n_rows, stop / self.n_rows)
+        else:
+            self.vsb.set(0.0, 1.0)
+
+    def scroll_to(self, row):
+        """Show the page starting at ``row``, clamped so the last page is full."""
+        row = max(0, min(int(row), self.n_rows - self.page_rows))
+        if row != self.first_row:
+            self.first_row = row
+            self.refresh()
+        return "break"
+
+    def scroll_by(self, rows):
+        """Move the view by ``rows`` rows (negative scrolls up)."""
+        return self.scroll_to(self.first_row + rows)
+
+    def on_scrollbar(self, action, value, unit=None):
+        """Translate the scrollbar's ``moveto``/``scroll`` commands into a row offset."""
+        if action == "moveto":
+            self.scroll_to(round(float(value) * self.n_rows))
+        elif action == "scroll":
+            self.scroll_by(int(value) * (self.page_rows if unit == "pages" else 1))
+
+    def on_mouse_wheel(self, event, direction=None):
+        """Scroll a few rows per wheel step."""
+        if direction is None:
+            direction = -int(np.sign(event.delta))
+        return self.scroll_by(direction * self.WHEEL_ROWS)
+
+    def on_configure(self, event=None):
+        """Resize the page once Tk has laid out the resized Treeview."""
+        self.after_idle(self.fit_page_to_height)
+
+    def fit_page_to_height(self):
+        """Match the number of items to the rows that fit in the Treeview."""
+        bbox = self.tree.bbox(self.items[0]) if self.items else ""
+        if not bbox:
+            return
+        heading_height, row_height = bbox[1], bbox[3]
+        page_rows = min(max(1, (self.tree.winfo_height() - heading_height) // max(row_height, 1)), self.n_rows)
+        if page_rows != self.page_rows:
+            self.page_rows = page_rows
+            self.first_row = max(0, min(self.first_row, self.n_rows - self.page_rows))
+            self.refresh()